@@ -0,0 +1,221 @@
+"""
+A minimal HTTP/1.0 GET over an ESP32SPI socket, that awaits instead of blocking.
+
+adafruit_requests blocks until the whole reply is in, which freezes everything else
+for as long as the server takes. Here the wait for each piece of the reply is an
+asyncio sleep between polls of the socket, so other tasks carry on meanwhile, and the
+body is handed over a chunk at a time as it comes, never held whole.
+
+What still blocks: a DNS lookup, which takes as long as the ESP32 and the DNS server
+do, so each host is only looked up once (see resolve), and the TCP connect, which
+esp32spi waits on for the handshake, a round trip, at most 3 seconds.
+"""
+
+import time
+
+import asyncio
+import adafruit_esp32spi.adafruit_esp32spi_socket as esp_socket
+
+from posixtz import days_from_civil
+
+NS_PER_S = 1_000_000_000
+HTTP_TIMEOUT = 10  # Seconds, for the whole request.
+# How often to look at the socket while waiting for it.
+POLL_INTERVAL = 0.05  # Seconds
+CHUNK_SIZE = 64
+MONTHS = "JanFebMarAprMayJunJulAugSepOctNovDec"
+
+
+# Host name: IP address, as looked up by resolve.
+_addresses = {}
+
+
+class Response:
+    """A reply: status and headers (by lowercase name) as get() returns, then the
+    body read from the socket as it comes, with `async for chunk in response`.
+
+    Each chunk is only good until the next is read. The socket is closed at the end
+    of the body, or by close(), which has to be called if the body isn't read to the
+    end. `sent_ns` and `received_ns` are time.monotonic_ns() as the request went out
+    and as the first of the reply came back."""
+
+    def __init__(self, sock, deadline_ns: int) -> None:
+        self.status = 0
+        self.headers = {}
+        self.sent_ns = 0
+        self.received_ns = 0
+        self._sock = sock
+        self._deadline = deadline_ns
+        self._buffer = bytearray(CHUNK_SIZE)
+        # Body that came in with the headers, handed over first.
+        self._pending = b""
+        # Body bytes still to come, or -1 to read until the server closes.
+        self._remaining = -1
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self._pending:
+            chunk, self._pending = self._pending, b""
+            return chunk
+        sock = self._sock
+        if (
+            sock is None
+            or self._remaining == 0
+            or self._remaining < 0
+            and not sock.available()
+            and not sock.connected()
+        ):
+            self.close()
+            raise StopAsyncIteration
+        try:
+            size = await readable(sock, self._deadline)
+        except OSError:
+            self.close()
+            raise
+        if 0 < self._remaining < size:
+            size = self._remaining
+        size = sock.recv_into(self._buffer, min(size, CHUNK_SIZE))
+        if not size:
+            self.close()
+            raise StopAsyncIteration
+        if self._remaining > 0:
+            self._remaining -= size
+        return memoryview(self._buffer)[:size]
+
+    def close(self) -> None:
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+
+def split_url(url: str) -> tuple:
+    """(host, port, path) from an http:// URL."""
+
+    if not url.startswith("http://"):
+        raise ValueError("Only http:// URLs, not " + url)
+    rest = url[7:]
+    slash = rest.find("/")
+    if slash < 0:
+        hostport, path = rest, "/"
+    else:
+        hostport, path = rest[:slash], rest[slash:]
+    colon = hostport.find(":")
+    if colon < 0:
+        return hostport, 80, path
+    return hostport[:colon], int(hostport[colon + 1 :]), path
+
+
+def parse_date(value: str):
+    """Unix epoch seconds from an RFC 1123 Date header, like
+    "Sun, 18 Oct 2026 10:41:07 GMT", or None if it isn't one."""
+
+    fields = value.split()
+    if len(fields) != 6 or fields[5] != "GMT":
+        return None
+    month = MONTHS.find(fields[2])
+    clock = fields[4].split(":")
+    if month < 0 or month % 3 or len(clock) != 3:
+        return None
+    try:
+        day = int(fields[1])
+        year = int(fields[3])
+        hour, minute, second = int(clock[0]), int(clock[1]), int(clock[2])
+    except ValueError:
+        return None
+    days = days_from_civil(year, month // 3 + 1, day)
+    return days * 86400 + hour * 3600 + minute * 60 + second
+
+
+def resolve(host: str):
+    """The IP address of `host`, only looked up with the ESP32 the first time, as
+    that blocks everything until the DNS server answers."""
+
+    address = _addresses.get(host)
+    if address is None:
+        address = esp_socket.getaddrinfo(host, 0)[0][4][0]
+        _addresses[host] = address
+    return address
+
+
+def forget(host: str) -> None:
+    """Look `host` up again next time, as it may have moved."""
+
+    _addresses.pop(host, None)
+
+
+async def readable(sock, deadline_ns: int) -> int:
+    """Wait until `sock` has data, returns how much. Raises OSError at `deadline_ns`."""
+
+    while True:
+        available = sock.available()
+        if available:
+            return available
+        if time.monotonic_ns() >= deadline_ns:
+            raise OSError("Timed out")
+        await asyncio.sleep(POLL_INTERVAL)
+
+
+async def get(url: str, headers: dict = None, timeout: int = HTTP_TIMEOUT):
+    """GET `url`, returns a Response once the headers are in, to read the body from.
+    Raises OSError on timeouts and network errors, ValueError on a reply that isn't
+    HTTP."""
+
+    host, port, path = split_url(url)
+    deadline = time.monotonic_ns() + timeout * NS_PER_S
+
+    request = "GET {0} HTTP/1.0\r\nHost: {1}\r\nConnection: close\r\n".format(
+        path, host
+    )
+    if headers:
+        for name, value in headers.items():
+            request += "{0}: {1}\r\n".format(name, value)
+    request += "\r\n"
+
+    sock = esp_socket.socket()
+    response = Response(sock, deadline)
+    try:
+        sock.settimeout(timeout)
+        try:
+            sock.connect((resolve(host), port))
+        except (OSError, RuntimeError):
+            forget(host)
+            raise
+        response.sent_ns = time.monotonic_ns()
+        sock.send(request.encode())
+
+        # The status line and headers, to the blank line. recv() would pad each
+        # read out to its full size, so only what's there is read into a buffer.
+        buffer = response._buffer
+        head = b""
+        while True:
+            size = await readable(sock, deadline)
+            if not head:
+                response.received_ns = time.monotonic_ns()
+            size = sock.recv_into(buffer, min(size, CHUNK_SIZE))
+            head += buffer[:size]
+            end = head.find(b"\r\n\r\n")
+            if end >= 0:
+                break
+        lines = head[:end].decode().split("\r\n")
+        status = lines[0].split(" ")
+        if len(status) < 2 or not status[0].startswith("HTTP/"):
+            raise ValueError("Not an HTTP reply")
+        response.status = int(status[1])
+        for line in lines[1:]:
+            colon = line.find(":")
+            if colon > 0:
+                name = line[:colon].strip().lower()
+                response.headers[name] = line[colon + 1 :].strip()
+
+        # The start of the body, if it came in with the headers.
+        response._pending = head[end + 4 :]
+        length = int(response.headers.get("content-length", -1))
+        if length >= 0:
+            response._remaining = max(0, length - len(response._pending))
+    except BaseException:
+        # There are only a few sockets on the ESP32, so never leave one open.
+        response.close()
+        raise
+    return response
@@ -1,82 +1,626 @@
+import sys
 import time
+import asyncio
 import board
 import busio
 import neopixel
-from adafruit_esp32spi.adafruit_esp32spi_wifimanager import (
-    ESPSPI_WiFiManager,
-    adafruit_esp32spi,
-)
-from adafruit_datetime import timezone, timedelta
+from adafruit_esp32spi import adafruit_esp32spi
+import adafruit_esp32spi.adafruit_esp32spi_socket as esp_socket
 from digitalio import DigitalInOut
+import microcontroller
 import rtc
+import supervisor
 
+import ahttp
+from cron import Scheduler
+from drift import DriftEstimator
+from colorlut import ColorTable
+from gcpolicy import GCPolicy
+import jsonscan
+from ringlog import LEVELS, log
+from heapstats import HeapStats, HeapWatch
+from loopstats import LoopStats
+import sntp
+import timesync
+import warmstart
+from wifi import WiFi
 from _secrets import secrets
 
-WIFI_TEST_URL = "http://wifitest.adafruit.com/testwifi/index.html"
+# Each sync asks all of these, and goes with what most of them agree on.
+NTP_SERVERS = ("0.pool.ntp.org", "1.pool.ntp.org", "2.pool.ntp.org")
+NTP_TIMEOUT = 2  # Seconds
+# Fewer samples than this and worldtimeapi is asked too.
+MIN_TIME_SAMPLES = 3
+# A time source that keeps failing or disagreeing is logged at most this often.
+TIME_SOURCE_LOG_EVERY = 60 * 60  # Seconds
+# HTTP Date samples older than this aren't used, as monotonic drifts too.
+DATE_SAMPLE_MAX_AGE = 10 * 60  # Seconds
+
+# The only worldtimeapi fields we read, the rest are skipped as they stream in.
+TIME_KEYS = (
+    "dst",
+    "dst_from",
+    "dst_offset",
+    "dst_until",
+    "raw_offset",
+    "timezone",
+    "unixtime",
+)
+
+# A warm start snapshot older than this isn't trusted to show the time.
+WARM_START_MAX_AGE = 24 * 60 * 60
+# Rewrite an otherwise unchanged snapshot this often, to spare the flash.
+WARM_START_REFRESH = 6 * 60 * 60
+
+# Wake this long after a deadline, so the RTC has surely ticked over when we look.
+WAKE_MARGIN_NS = 10_000_000
+# How often the housekeeping task runs: serial commands, garbage and heap checks.
+HOUSEKEEPING_INTERVAL = 10  # Seconds
+# Setting the RTC blocks for at most this long, to hit the start of a second.
+SET_RTC_BLOCK_NS = 20_000_000
+# How often to look for an NTP reply while waiting for one.
+NTP_POLL_INTERVAL = 0.02  # Seconds
+# An HTTP Date header further than this from the RTC means it's time for a proper sync.
+# Dates are whole seconds, so they're only good to about a second anyway.
+HTTP_DATE_TOLERANCE = 2  # Seconds
+# After setting the RTC from a Date header at boot, do a proper sync this much later.
+HTTP_DATE_REFINE = 60  # Seconds
 
 
 class BasicApp:
     """Provides the common app setup and functionality."""
 
     def __init__(self):
+        self.colors: ColorTable = None
         self.brightness = 1.00
         self.board = board
-        self.cron_jobs = {}
-        self._cron_last_ran = {}
+        self.cron = Scheduler()
         self.status_label = None
+        # Zone name: (dst_from, dst_until) as RTC epoch seconds, None where unknown.
+        self.dst_transitions = {}
+        # (time.time(), time.monotonic_ns()) at the instant the RTC ticked a second.
+        self._second_edge = None
+        # When the RTC was last set from the network, and how fast it's drifting.
+        self.last_sync = None
+        self.drift = DriftEstimator()
+        # Sync again before the corrected time could be this far out.
+        self.time_error_bound_ns = 100_000_000
+        # The snapshot last read from or written to NVM.
+        self._warm_start = None
+        # Main loop phase timings, None while they're off. See the stats command.
+        self.loop_stats: LoopStats = None
+        # When to collect garbage.
+        self.gc_policy = GCPolicy()
+        # Free memory and fragmentation, always watched, see check_heap.
+        self.heap_watch = HeapWatch()
+        # Set to wake the sync task early, see sync_soon.
+        self.sync_wake = asyncio.Event()
+        # Set once the RTC can be believed, from a sync or a warm start.
+        self.time_known = asyncio.Event()
+        # Set the RTC from HTTP Date headers until it's synced, and sanity check it
+        # with them after. See check_http_date.
+        self.http_date_sync = False
+        # (time.monotonic_ns(), timesync sample) from recent HTTP Date headers.
+        self.date_samples = []
+        # The WiFi, brought up by the sync task. See network_setup.
+        self.wifi: WiFi = None
+        # What's been typed on the serial console since the last Enter.
+        self.serial_line = ""
+        # What can be typed on the serial console: name: method(args).
+        self.commands = {
+            "stats": self.stats_command,
+            "heap": self.heap_command,
+            "log": self.log_command,
+        }
 
     def set_boot_status(self, msg: str):
         """Set the on-boot status, if it's still being displayed."""
         if self.status_label:
             self.status_label.text = msg.replace(" ", "\n")
 
-    def cron_run(self):
-        """Check for and run due cron jobs.
+    def main(self):
+        """Run the app until the power goes."""
 
-        Cron jobs are defined as a dict of method names, to intervals(in seconds)
-        they should run."""
+        asyncio.run(self.run_tasks())
 
-        now = time.time()
-        for job in self.cron_jobs:
-            if job not in self._cron_last_ran or (
-                self._cron_last_ran[job] + self.cron_jobs[job] < now
-            ):
-                print(f"Running scheduled job: {job}")
-                getattr(self, job)()
-                self._cron_last_ran[job] = now
+    async def run_tasks(self):
+        """Run the render, sync and housekeeping tasks.
+
+        The tasks only ever wait by awaiting, so a sync stuck on the network can't
+        stop the display updating."""
+
+        await asyncio.gather(
+            self.render_task(), self.sync_task(), self.housekeeping_task()
+        )
+
+    async def render_task(self):
+        """Keep the display up to date, once `time_known` is set. Apps with a display
+        override this; without one, there's only the RTC's phase to learn, after which
+        it returns and the other tasks carry on."""
+
+        await self.time_known.wait()
+        if self._second_edge is None:
+            await self.find_second_edge()
+
+    async def sync_task(self):
+        """Bring the WiFi up a step at a time, then run the cron jobs as they come
+        due, or sooner when asked by sync_soon."""
+
+        while True:
+            delay = await self.wifi.step()
+            if delay is None:  # The network's up.
+                if self.wifi.test_response is not None:
+                    await self.check_http_date(self.wifi.test_response)
+                    self.wifi.test_response = None
+                await self.cron_run()
+                delay = self.cron.next_deadline() - time.monotonic_ns()
+                delay /= 1_000_000_000
+            else:
+                self.set_boot_status(self.wifi.state)
+            try:
+                await asyncio.wait_for(self.sync_wake.wait(), max(0, delay))
+            except asyncio.TimeoutError:
+                pass
+            self.sync_wake.clear()
+
+    def sync_soon(self, name: str):
+        """Have the sync task run cron job `name` now, rather than when it's due."""
+
+        self.cron.reschedule(name, 0)
+        self.sync_wake.set()
+
+    async def housekeeping_task(self):
+        """Serial commands, and collecting garbage when it's worth it."""
+
+        while True:
+            self.serial_command()
+            stats = self.loop_stats
+            if stats is not None:
+                t = stats.start()
+            # Only collect when enough has been allocated, see gcpolicy.
+            collected = self.gc_policy.maybe_collect()
+            if stats is not None:
+                t = stats.lap("gc", t)
+            if collected:
+                self.check_heap()
+                if stats is not None:
+                    stats.lap("heap", t)
+            await asyncio.sleep(HOUSEKEEPING_INTERVAL)
+
+    async def cron_run(self):
+        """Run the cron jobs that are due.
+
+        Cron jobs are async method names added to `self.cron` with the interval (in
+        seconds) they should run at. They're the heavy ones, network and all, so
+        they get a freshly collected heap."""
+
+        deadline = self.cron.next_deadline()
+        if deadline is not None and deadline <= time.monotonic_ns():
+            self.gc_policy.collect()
+            self.check_heap()
+        stats = self.loop_stats
+        if stats is not None:
+            t = stats.start()
+        ran = await self.cron.run_due(self)
+        if stats is not None and ran:
+            stats.lap("sync", t)  # Includes the time other tasks ran meanwhile.
+
+    def serial_command(self):
+        """Run a command typed on the serial console, once its line is in.
+
+        Only what's already arrived is read, as input() would block everything until
+        Enter. Looked at every HOUSEKEEPING_INTERVAL, so it can take that long to
+        answer."""
+
+        # Just a bool on CircuitPython 8, so a byte at a time while there are any.
+        typed = ""
+        while supervisor.runtime.serial_bytes_available:
+            typed += sys.stdin.read(1)
+        if not typed:
+            return
+        print(typed, end="")  # Echo, as input() does.
+        # Enter sends \r, or \r\n, so blank lines in between are skipped.
+        lines = (self.serial_line + typed).replace("\r", "\n").split("\n")
+        self.serial_line = lines.pop()  # Not finished yet.
+        for line in lines:
+            words = line.split()
+            if not words:
+                continue
+            command = self.commands.get(words[0])
+            if command is None:
+                print("Commands:", " ".join(sorted(self.commands)))
+            else:
+                command(words[1:])
+
+    def stats_command(self, args: list):
+        """stats [on|off|reset]: show the main loop's phase timings, or switch them."""
+
+        if args and args[0] == "on":
+            if self.loop_stats is None:
+                self.loop_stats = LoopStats()
+        elif args and args[0] == "off":
+            self.loop_stats = None
+        elif args and args[0] == "reset":
+            if self.loop_stats is not None:
+                heap = self.loop_stats.heap
+                self.loop_stats = LoopStats()
+                if heap is not None:
+                    self.loop_stats.heap = HeapStats()
+        elif self.loop_stats is None:
+            print("Loop stats are off, 'stats on' to start them")
+        else:
+            self.loop_stats.print_report()
+
+    def heap_command(self, args: list):
+        """heap [on|off]: show free memory, or switch per phase heap samples on the
+        loop stats (which turns those on too)."""
+
+        if args and args[0] == "on":
+            self.stats_command(["on"])
+            if self.loop_stats.heap is None:
+                self.loop_stats.heap = HeapStats()
+        elif args and args[0] == "off":
+            if self.loop_stats is not None:
+                self.loop_stats.heap = None
+        else:
+            self.heap_watch.print_report()
+            if self.loop_stats is not None and self.loop_stats.heap is not None:
+                self.loop_stats.heap.print_report(self.loop_stats.names)
+
+    def log_command(self, args: list):
+        """log [keep] [debug|info|warning|error]: show the recent log, or set the
+        level printed as it happens (or kept, with keep)."""
+
+        if not args:
+            log.dump()
+            return
+        level = LEVELS.get(args[-1])
+        if level is None:
+            print("Levels:", " ".join(LEVELS))
+        elif args[0] == "keep":
+            log.level = level
+        else:
+            log.echo = level
+
+    def check_heap(self):
+        """Reset cleanly if the heap is running out, rather than die of a MemoryError.
+
+        Call right after a collection."""
+
+        reason = self.heap_watch.check(time.monotonic_ns() // sntp.NS_PER_S)
+        if reason is not None:
+            self.soft_reset(reason)
+
+    def soft_reset(self, reason: str):
+        """Restart code.py with a fresh heap. Override to save state first."""
+
+        log.error("Soft reset: {0}", reason)
+        self.heap_watch.print_report()
+        supervisor.reload()
+
+    async def find_second_edge(self):
+        """Wait for the RTC to tick over a second, to learn its phase vs monotonic.
+
+        time.time() only has whole seconds, so without this, anything waiting on
+        the RTC could be up to a second late. Reads taken between other tasks can be
+        late by however long those block for, so they only narrow down where the tick
+        is, a second apart each time, until it's known to SET_RTC_BLOCK_NS. Then this
+        blocks for just that bit to catch the tick itself."""
+
+        # The next tick from `second` is in (after, before] on the monotonic clock.
+        second = time.time()
+        after = time.monotonic_ns()
+        before = after + sntp.NS_PER_S
+        while True:
+            # Halfway in, or late enough that being still on `second` is close enough.
+            wake = min((after + before) // 2, before - SET_RTC_BLOCK_NS)
+            await self.sleep_until(wake)
+            now = time.time()
+            now_ns = time.monotonic_ns()
+            if now == second:
+                after = now_ns
+                if before - after <= SET_RTC_BLOCK_NS:
+                    break
+            else:
+                # Ticked since `after`, so the next one's a second on from there.
+                before = min(before, now_ns) + sntp.NS_PER_S
+                after += sntp.NS_PER_S
+                second = now
+
+        while time.time() == second and time.monotonic_ns() <= before:
+            time.sleep(0.001)
+        self._second_edge = (time.time(), time.monotonic_ns())
+
+    def monotonic_at(self, when: int) -> int:
+        """The time.monotonic_ns() at which time() will read `when` (seconds)."""
+
+        edge_time, edge_ns = self._second_edge or (time.time(), time.monotonic_ns())
+        when_ns = when * sntp.NS_PER_S
+        if self.last_sync is not None:
+            # Undo the drift correction: the RTC reads this when it's really `when`.
+            rate = self.drift.rate_ppb
+            since_sync = when_ns - self.last_sync * sntp.NS_PER_S
+            when_ns += since_sync * rate // (sntp.NS_PER_S - rate)
+        return edge_ns + when_ns - edge_time * sntp.NS_PER_S + WAKE_MARGIN_NS
+
+    def rtc_ns(self) -> int:
+        """What the RTC reads right now, in ns, from when its second last ticked.
+
+        Just whole seconds until find_second_edge has been, so nothing blocks on it."""
+
+        if self._second_edge is None:
+            return time.time() * sntp.NS_PER_S
+        edge_time, edge_ns = self._second_edge
+        return edge_time * sntp.NS_PER_S + time.monotonic_ns() - edge_ns
+
+    def time_ns(self) -> int:
+        """The time now in Unix ns: the RTC, less how far it's drifted since the last
+        sync. Use this, or time(), rather than time.time()."""
+
+        now_ns = self.rtc_ns()
+        if self.last_sync is None:
+            return now_ns
+        return now_ns - self.drift.correction_ns(
+            now_ns - self.last_sync * sntp.NS_PER_S
+        )
 
-    def network_setup(self) -> ESPSPI_WiFiManager:
-        """Activate the WiFi network."""
+    def time(self) -> int:
+        """The time now in Unix seconds, drift corrected, see time_ns."""
 
-        self.set_boot_status("WiFi Setup")
+        return self.time_ns() // sntp.NS_PER_S
+
+    async def sleep_until(self, deadline_ns: int):
+        """Sleep until time.monotonic_ns() reaches `deadline_ns`."""
+
+        remaining = deadline_ns - time.monotonic_ns()
+        if remaining > 0:
+            await asyncio.sleep(remaining / 1_000_000_000)
+
+    def network_setup(self):
+        """Get the ESP32 ready. The WiFi is brought up later by the sync task, so
+        boot doesn't wait on the access point."""
 
         esp32_cs = DigitalInOut(board.ESP_CS)
         esp32_ready = DigitalInOut(board.ESP_BUSY)
         esp32_reset = DigitalInOut(board.ESP_RESET)
         spi = busio.SPI(board.SCK, board.MOSI, board.MISO)
         esp = adafruit_esp32spi.ESP_SPIcontrol(spi, esp32_cs, esp32_ready, esp32_reset)
+        self.esp = esp
+        esp_socket.set_interface(esp)
+
+        pixel = neopixel.NeoPixel(board.NEOPIXEL, 1, brightness=0.2)
+        self.wifi = WiFi(esp, secrets, pixel)
+
+    async def set_rtc(self):
+        """Set the RTC to UTC, from what most of the SNTP servers, recent HTTP Date
+        headers, and worldtimeapi if those aren't enough, agree on. See timesync.
+
+        Returns seconds until the next sync is needed, from the drift estimate."""
 
-        self.network = ESPSPI_WiFiManager(
-            esp,
-            secrets,
-            status_pixel=neopixel.NeoPixel(board.NEOPIXEL, 1, brightness=0.2),
-            debug=True,
+        oldest = time.monotonic_ns() - DATE_SAMPLE_MAX_AGE * sntp.NS_PER_S
+        samples = [s for taken, s in self.date_samples if taken >= oldest]
+        self.date_samples = []
+        for server in NTP_SERVERS:
+            try:
+                samples.append(await self.ntp_sample(server))
+            except (OSError, RuntimeError, ValueError) as e:
+                log.warning(
+                    "NTP from {0} failed ({1})",
+                    server,
+                    e,
+                    every=TIME_SOURCE_LOG_EVERY,
+                    key=server,
+                )
+        if len(samples) < MIN_TIME_SAMPLES:
+            try:
+                await self.lookup_timezone(name="UTC", samples=samples)
+            except (OSError, RuntimeError, ValueError, KeyError) as e:
+                log.warning(
+                    "worldtimeapi time failed ({0!r})", e, every=TIME_SOURCE_LOG_EVERY
+                )
+
+        offset, error, used = timesync.combine(samples)
+        for i, (sample_offset, _, source) in enumerate(samples):
+            if i not in used:
+                log.warning(
+                    "Time from {0} disagrees by {1}ms, ignored",
+                    source,
+                    (sample_offset - offset) // 1_000_000,
+                    every=TIME_SOURCE_LOG_EVERY,
+                    key=source,
+                )
+        log.info(
+            "Time from {0} of {1} sources, +/-{2}ms",
+            len(used),
+            len(samples),
+            error // 1_000_000,
+        )
+        now = time.monotonic_ns()
+        await self.set_rtc_time(now + offset, now, bound_ns=error)
+        # Next time, when the drift correction could have drifted out of bounds. Or
+        # the job's own interval, if the sources aren't good enough for the bound.
+        interval = self.drift.next_interval(self.time_error_bound_ns, error)
+        log.info(
+            "Drift {0}+/-{1}ppb, next sync in {2}s",
+            self.drift.rate_ppb,
+            self.drift.uncertainty_ppb,
+            "the usual" if interval is None else interval,
         )
-        self.network_test()
+        return interval
 
-    def network_test(self):
-        """Test that the network is working by fetching and printing data."""
+    async def ntp_sample(self, server: str) -> tuple:
+        """Ask an SNTP server the time, over a UDP socket on the ESP32. Returns a
+        timesync sample."""
 
-        self.set_boot_status("WiFi Test")
+        sock = esp_socket.socket(type=esp_socket.SOCK_DGRAM)
+        try:
+            sock.settimeout(NTP_TIMEOUT)
+            address = ahttp.resolve(server)
+            sock.connect((address, sntp.NTP_PORT), conntype=self.esp.UDP_MODE)
+            packet = sntp.request_packet()
+            sent = time.monotonic_ns()
+            sock.send(packet)
+            # Poll for the reply, rather than block in recv_into until it's here.
+            deadline = sent + NTP_TIMEOUT * sntp.NS_PER_S
+            while not sock.available():
+                if time.monotonic_ns() >= deadline:
+                    # Pool servers come and go, so look it up again next time.
+                    ahttp.forget(server)
+                    raise OSError("NTP timed out")
+                await asyncio.sleep(NTP_POLL_INTERVAL)
+            received = time.monotonic_ns()
+            size = sock.recv_into(packet, sntp.NTP_PACKET_SIZE)
+        finally:
+            sock.close()
+        unix_ns, round_trip = sntp.parse_reply(packet[:size], sent, received)
+        log.debug("NTP from {0}, round trip {1}ms", server, round_trip // 1_000_000)
+        return timesync.sample(unix_ns, received, round_trip, source=server)
 
-        print("Fetching text from", WIFI_TEST_URL)
-        r = self.network.get(WIFI_TEST_URL)
-        print("-" * 40)
-        print(r.text)
-        print("-" * 40)
-        r.close()
+    async def set_rtc_time(
+        self, unix_ns: int, monotonic_ns: int, precise=True, bound_ns: int = 0
+    ):
+        """Set the RTC, given the Unix time in ns at an instant of time.monotonic_ns(),
+        good to `bound_ns`.
 
-        print("Done!")
+        The RTC only holds whole seconds, so this waits for the next second to start
+        before setting it, which keeps its phase right too. A time that isn't
+        `precise` sets the RTC but doesn't count as a sync, for drift and warm starts.
+        """
+
+        if self.last_sync is not None and self._second_edge is None:
+            await self.find_second_edge()
+
+        now_ns = unix_ns + time.monotonic_ns() - monotonic_ns
+        if self.last_sync is not None:
+            # How far the RTC has wandered off since it was last set.
+            error_ns = self.rtc_ns() - now_ns
+            log.info(
+                "RTC was off by {0}ms, {1}ms corrected",
+                error_ns // 1_000_000,
+                (self.time_ns() - now_ns) // 1_000_000,
+            )
+            # A sync worse than the bound can't measure drift that matters, whole
+            # second sources would just have the fit chase their rounding.
+            if (
+                now_ns // sntp.NS_PER_S > self.last_sync
+                and bound_ns <= self.time_error_bound_ns
+            ):
+                self.drift.add(
+                    self.last_sync, now_ns // sntp.NS_PER_S, error_ns, bound_ns
+                )
+
+        # Sleep most of the way to the next second, and block for the last bit, as
+        # other tasks could keep us past it otherwise. If they kept us past it anyway,
+        # sleep again for the one after, rather than block for most of a second.
+        wait_ns = sntp.NS_PER_S - now_ns % sntp.NS_PER_S
+        while wait_ns > SET_RTC_BLOCK_NS:
+            await asyncio.sleep((wait_ns - SET_RTC_BLOCK_NS) / sntp.NS_PER_S)
+            now_ns = unix_ns + time.monotonic_ns() - monotonic_ns
+            wait_ns = sntp.NS_PER_S - now_ns % sntp.NS_PER_S
+        time.sleep(wait_ns / sntp.NS_PER_S)
+
+        old_time = time.time()
+        now = (now_ns + wait_ns) // sntp.NS_PER_S
+        rtc.RTC().datetime = time.localtime(now)
+        self._second_edge = (time.time(), time.monotonic_ns())
+        if precise:
+            self.last_sync = now
+        self.time_known.set()
+        log.info(
+            "RTC updated from Internet: {0}, change was: {1}s",
+            now,
+            old_time - time.time(),
+        )
+
+    async def check_http_date(self, response):
+        """Keep a reply's Date header as a sample for the next sync. With
+        `http_date_sync` on, also set the RTC from it if it hasn't been set yet, or
+        ask for a proper sync if it's too far off.
+
+        Any request will do, so at boot the RTC is set from the WiFi test rather
+        than waiting on another round trip for the time."""
+
+        date = response.headers.get("date")
+        date = None if date is None else ahttp.parse_date(date)
+        if date is None:
+            return
+        # Dates are truncated to the second, so +0.5s on average, and were stamped
+        # by the server about half way through the round trip.
+        round_trip = response.received_ns - response.sent_ns
+        unix_ns = date * sntp.NS_PER_S + sntp.NS_PER_S // 2
+        monotonic_ns = response.sent_ns + round_trip // 2
+        sample = timesync.sample(
+            unix_ns, monotonic_ns, round_trip, sntp.NS_PER_S // 2, source="Date"
+        )
+        self.date_samples.append((monotonic_ns, sample))
+        if not self.http_date_sync:
+            return
+
+        if not self.time_known.is_set():
+            log.info("Setting the RTC from an HTTP Date header")
+            await self.set_rtc_time(unix_ns, monotonic_ns, precise=False)
+            if "set_rtc" in self.cron:
+                self.cron.reschedule("set_rtc", HTTP_DATE_REFINE)
+            return
+
+        offset, error, _ = sample
+        error_ns = self.time_ns() - (time.monotonic_ns() + offset)
+        if abs(error_ns) > HTTP_DATE_TOLERANCE * sntp.NS_PER_S + error:
+            log.warning("RTC is {0}ms off the HTTP Date", error_ns // 1_000_000)
+            self.sync_soon("set_rtc")
+
+    def load_warm_start(self, count: int):
+        """Read the warm start snapshot for `count` zones from NVM.
+
+        Returns (next_transition, offsets) if there's one and the RTC still looks
+        like it's running from the sync it records, otherwise None."""
+
+        nvm = microcontroller.nvm
+        if nvm is None:
+            return None
+        snapshot = warmstart.unpack(nvm[: warmstart.size(count)], count)
+        if snapshot is None:
+            log.info("No warm start snapshot")
+            return None
+
+        last_sync, next_transition, drift_ppb, offsets = snapshot
+        if not last_sync <= time.time() < last_sync + WARM_START_MAX_AGE:
+            log.info("Warm start snapshot is stale")
+            return None
+
+        self.last_sync = last_sync
+        self.drift = DriftEstimator(drift_ppb)
+        self._warm_start = snapshot
+        self.time_known.set()
+        log.info("Warm start from sync at {0}", last_sync)
+        return next_transition, offsets
+
+    def save_warm_start(self, next_transition, offsets: list):
+        """Write the warm start snapshot to NVM, if it's worth wearing the flash."""
+
+        nvm = microcontroller.nvm
+        if nvm is None or self.last_sync is None:
+            return
+        saved = self._warm_start
+        if (
+            saved is not None
+            and saved[1] == next_transition
+            and saved[3] == offsets
+            and self.last_sync < saved[0] + WARM_START_REFRESH
+        ):
+            return
+
+        data = warmstart.pack(
+            self.last_sync, next_transition, self.drift.rate_ppb, offsets
+        )
+        nvm[0 : len(data)] = data
+        self._warm_start = (
+            self.last_sync,
+            next_transition,
+            self.drift.rate_ppb,
+            offsets[:],
+        )
+        log.debug("Saved warm start snapshot")
 
     def parse_time(self, timestring: str, is_dst=-1):
         """Given a string of the format YYYY-MM-DDTHH:MM:SS.SS-HH:MM (and
@@ -85,70 +629,127 @@ class BasicApp:
         can use time.mktime() on result if epoch seconds is needed instead.
         Time string is assumed local time; UTC offset is ignored. If seconds
         value includes a decimal fraction it's ignored.
+
+        Done in one pass over the characters, with no lists or substrings.
         """
 
-        date_time = timestring.split("T")  # Separate into date and time
-        year_month_day = date_time[0].split("-")  # Separate time into Y/M/D
-        hour_minute_second = date_time[1].split("+")[0].split("-")[0].split(":")
+        # Fields missing off the end are 0.
+        year = month = day = hour = minute = 0
+        field = value = 0  # The field being read, and its digits so far.
+        for c in timestring:
+            if "0" <= c <= "9":
+                value = value * 10 + ord(c) - 0x30
+                continue
+            if field == 5:
+                break  # The end of the seconds, the fraction and offset are ignored.
+            if field == 0:
+                year = value
+            elif field == 1:
+                month = value
+            elif field == 2:
+                day = value
+            elif field == 3:
+                hour = value
+            else:
+                minute = value
+            field += 1
+            value = 0
+        # Whatever field the string ended in is still pending.
+        second = 0
+        if field == 5:
+            second = value
+        elif field == 4:
+            minute = value
+        elif field == 3:
+            hour = value
+        elif field == 2:
+            day = value
+        elif field == 1:
+            month = value
+        else:
+            year = value
         return time.struct_time(
-            (
-                int(year_month_day[0]),
-                int(year_month_day[1]),
-                int(year_month_day[2]),
-                int(hour_minute_second[0]),
-                int(hour_minute_second[1]),
-                int(hour_minute_second[2].split(".")[0]),
-                -1,
-                -1,
-                is_dst,
-            )
+            (year, month, day, hour, minute, second, -1, -1, is_dst)
         )
 
-    def lookup_timezone(self, name: str, set_rtc=False):
+    def parse_epoch(self, timestring: str):
+        """Epoch seconds for a UTC ISO time string, or None for None.
+
+        The RTC is kept in UTC, so time.mktime() gives UTC epoch seconds here."""
+
+        if timestring is None:
+            return None
+        return time.mktime(self.parse_time(timestring))
+
+    async def lookup_timezone(self, name: str, samples: list = None) -> int:
         """Update system date/time from WorldTimeAPI public server;
         no account required. Pass in time zone string
         (http://worldtimeapi.org/api/timezone for list)
-        or None to use IP geolocation. Returns current local time as a
-        time.struct_time and UTC offset as string. This may throw an
-        exception on fetch_data() - it is NOT CAUGHT HERE, should be
+        or None to use IP geolocation. Returns the current UTC offset of
+        the zone in seconds, DST included, and remembers the zone's DST
+        start/end in `dst_transitions`. This may throw an
+        exception on the request - it is NOT CAUGHT HERE, should be
         handled in the calling code because different behaviors may be
         needed in different situations (e.g. reschedule for later).
+        Pass a list as `samples` to have the time in the reply added to it, as a
+        timesync sample.
         """
 
         time_url = f"http://worldtimeapi.org/api/timezone/{name}"
 
-        print(f"Fetching time from {time_url}...")
-        time_data: dict = self.network.get(
-            time_url, headers={"Accept": "application/json"}
-        ).json()
+        log.info("Fetching time from {0}", time_url)
+        response = await ahttp.get(time_url, headers={"Accept": "application/json"})
+        try:
+            if response.status != 200:
+                raise OSError("HTTP {0} from worldtimeapi".format(response.status))
+            if samples is None:
+                await self.check_http_date(response)
+            time_data = await jsonscan.extract_async(response, TIME_KEYS)
+        finally:
+            response.close()
 
         # This is here because we sync the clock via the same API as lookup TZ offsets.
-        if set_rtc:
-            time_struct = self.parse_time(
-                timestring=time_data["datetime"], is_dst=time_data["dst"]
-            )
-            old_time = time.time()
-            rtc.RTC().datetime = time_struct
-            print(
-                "RTC updated from Internet: {0}, change was: {1}s".format(
-                    time.localtime(), old_time - time.time()
+        if samples is not None:
+            # unixtime is truncated to the second, so it's +0.5s on average, and was
+            # stamped by the server about half way through the round trip.
+            round_trip = response.received_ns - response.sent_ns
+            log.debug("Round trip {0}ms", round_trip // 1_000_000)
+            samples.append(
+                timesync.sample(
+                    time_data["unixtime"] * sntp.NS_PER_S + sntp.NS_PER_S // 2,
+                    response.sent_ns + round_trip // 2,
+                    round_trip,
+                    sntp.NS_PER_S // 2,
+                    source="worldtimeapi",
                 )
             )
 
-        delta = timedelta(seconds=time_data["raw_offset"])
-        if time_data["dst"]:
-            delta += timedelta(seconds=time_data["dst_offset"])
-        print("{:20s} {:d}".format(time_data["timezone"], delta.seconds))
-        return timezone(offset=delta, name=time_data["timezone"])
+        # Only known while DST is in effect, worldtimeapi sends nulls otherwise.
+        dst_from = self.parse_epoch(time_data["dst_from"])
+        dst_until = self.parse_epoch(time_data["dst_until"])
+        self.dst_transitions[name] = (dst_from, dst_until)
+
+        offset = time_data["raw_offset"]
+        # If we asked right on the DST end, don't believe a stale answer.
+        if time_data["dst"] and (dst_until is None or dst_until > self.time()):
+            offset += time_data["dst_offset"]
+        log.info("{0:20s} {1:d}", time_data["timezone"], offset)
+        return offset
+
+    @property
+    def brightness(self) -> float:
+        return self.colors.brightness
+
+    @brightness.setter
+    def brightness(self, value: float):
+        if self.colors is None or value != self.colors.brightness:
+            self.colors = ColorTable(value)
 
     def color(self, color_in_hex: int) -> int:
         """Apply brightness to a color.
 
         This is the math you do when the board don't support brightness setting.
+        The tables are only rebuilt when the brightness changes, see colorlut.
         """
 
-        r = int(round((color_in_hex >> 16) * self.brightness, 0))
-        g = int(round((color_in_hex >> 8 & 0xFF) * self.brightness, 0))
-        b = int(round((color_in_hex & 0xFF) * self.brightness, 0))
-        # print(f"r:{r}, g:{g}, b:{b}")
-        return r << 16 | g << 8 | b
+        return self.colors.color(color_in_hex)
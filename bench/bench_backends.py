@@ -0,0 +1,73 @@
+"""
+Host-side cost of each clock face text backend, with the 4-zone layout.
+
+Reports heap used by the built face, the time to build it and draw the first frame, and
+the time to update it for a minute flip. Needs the Blinka displayio port:
+pip install adafruit-blinka-displayio
+Run from the repo root: python bench/bench_backends.py
+"""
+
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import terminalio  # noqa: E402
+
+# Imported up front so module loading isn't counted against a backend.
+import adafruit_display_text.bitmap_label  # noqa: E402, F401
+import glyphatlas  # noqa: E402, F401
+
+from clockface import TEXT_BACKENDS, ClockFace  # noqa: E402
+
+ROWS = [
+    ("US", [0xFF0000, 0xFFFFFF, 0x0000FF]),
+    ("DE", [0x808080, 0xFF0000, 0xFFD700]),
+    ("GR", [0x0000FF, 0xFFFFFF, 0x0000FF]),
+    ("MY", [0xFFFF00, 0x0000FF, 0xFF0000]),
+]
+OFFSETS = (-7, 2, 3, 8)
+MINUTES = 24 * 60
+
+
+def color(c):
+    return c
+
+
+def frame(face, minute):
+    face.update([(minute // 60 + o) % 24 for o in OFFSETS], minute % 60)
+
+
+def measure(backend):
+    """Return (heap bytes, build ms, us per minute flip)."""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    face = ClockFace(terminalio.FONT, ROWS, color, backend)
+    frame(face, 0)
+    build = time.perf_counter() - start
+    used, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    for minute in range(1, MINUTES + 1):
+        frame(face, minute)
+    flip = (time.perf_counter() - start) / MINUTES
+    return used, build * 1e3, flip * 1e6
+
+
+def main():
+    for backend in TEXT_BACKENDS:
+        used, build, flip = measure(backend)
+        print(
+            "{:13s} {:7d} B heap {:7.2f} ms build {:8.1f} us/flip".format(
+                backend, used, build, flip
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
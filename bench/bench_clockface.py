@@ -0,0 +1,87 @@
+"""
+Host-side allocation count for the clock face: rebuild every tick vs. retained labels.
+
+Needs the Blinka displayio port: pip install adafruit-blinka-displayio
+Run from the repo root: python bench/bench_clockface.py
+"""
+
+import gc
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import displayio  # noqa: E402
+import terminalio  # noqa: E402
+from adafruit_display_text.label import Label  # noqa: E402
+
+from clockface import ClockFace  # noqa: E402
+
+ROWS = [
+    ("US", [0xFF0000, 0xFFFFFF, 0x0000FF]),
+    ("DE", [0x808080, 0xFF0000, 0xFFD700]),
+    ("GR", [0x0000FF, 0xFFFFFF, 0x0000FF]),
+    ("MY", [0xFFFF00, 0x0000FF, 0xFF0000]),
+]
+TICKS = 60
+
+
+def color(c):
+    return c
+
+
+def rebuild(hours, minute):
+    """What time_group used to do every tick."""
+    font = terminalio.FONT
+    font_width = font.get_bounding_box()[0] - 1
+    group = displayio.Group(x=0, y=4)
+    for i, (country_code, flag_colors) in enumerate(ROWS):
+        y = i * 8
+        group.append(
+            Label(font, text="{:2d}".format(hours[i]), color=flag_colors[0], y=y)
+        )
+        if i == 0:
+            group.append(Label(font, text=":", color=flag_colors[1], x=font_width * 2))
+            group.append(
+                Label(font, text="{:02d}".format(minute), color=flag_colors[2], x=17)
+            )
+        else:
+            group.append(Label(font, text=country_code[0], color=flag_colors[1], y=y))
+            group.append(Label(font, text=country_code[1], color=flag_colors[2], y=y))
+    return group
+
+
+def count_allocations(fn):
+    """Run `fn` for TICKS ten-second ticks, return (blocks, peak bytes) per tick.
+
+    Whatever `fn` returns is kept alive, so the count covers everything a tick
+    builds, not just what survives it."""
+    kept = []
+    gc.collect()
+    gc.disable()
+    tracemalloc.start()
+    blocks = sys.getallocatedblocks()
+    for tick in range(TICKS):
+        minute = tick // 6  # A tick every 10s, so the minute flips every 6th.
+        kept.append(fn([(minute // 60 + o) % 24 for o in (0, 9, 10, 16)], minute % 60))
+    blocks = sys.getallocatedblocks() - blocks
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    gc.enable()
+    return blocks / TICKS, peak / TICKS
+
+
+def main():
+    face = ClockFace(terminalio.FONT, ROWS, color)
+    face.update([0, 9, 10, 16], 0)
+
+    for name, fn in (("rebuild", rebuild), ("retained", face.update)):
+        blocks, peak = count_allocations(fn)
+        print(
+            "{:9s} {:8.1f} blocks/tick {:10.0f} bytes/tick".format(name, blocks, peak)
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Host-side color() throughput, and how many levels survive on the 6-bit panel.
+
+Run from the repo root: python bench/bench_color.py
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import colors2 as colors  # noqa: E402
+from colorlut import ColorTable  # noqa: E402
+
+BRIGHTNESS = 0.2
+CALLS = 100_000
+FLAG_PALETTE = [
+    colors.RED,
+    colors.WHITE,
+    colors.BLUE,
+    colors.GRAY,
+    colors.GOLD,
+    colors.YELLOW,
+]
+
+
+def linear(color_in_hex, brightness=BRIGHTNESS):
+    """What BasicApp.color used to do."""
+    r = int(round((color_in_hex >> 16) * brightness, 0))
+    g = int(round((color_in_hex >> 8 & 0xFF) * brightness, 0))
+    b = int(round((color_in_hex & 0xFF) * brightness, 0))
+    return r << 16 | g << 8 | b
+
+
+def throughput(fn):
+    start = time.perf_counter()
+    for i in range(CALLS):
+        fn(FLAG_PALETTE[i % len(FLAG_PALETTE)])
+    return CALLS / (time.perf_counter() - start)
+
+
+def panel_levels(fn):
+    """Distinct non-black levels per channel, as the 6-bit panel shows them."""
+    return len({fn(v) >> 2 for v in range(256)} - {0})
+
+
+def main():
+    table = ColorTable(BRIGHTNESS)
+    print(
+        "calls/s:  linear {:10.0f}  table {:10.0f}".format(
+            throughput(linear), throughput(table.color)
+        )
+    )
+    print(
+        "levels:   linear {:10d}  table {:10d}".format(
+            panel_levels(lambda v: linear(v)), panel_levels(lambda v: table.red[v])
+        )
+    )
+    print("flag colors at {}:".format(BRIGHTNESS))
+    for c in FLAG_PALETTE:
+        print(
+            "  {:06X}  linear {:06X}  table {:06X}".format(c, linear(c), table.color(c))
+        )
+
+
+if __name__ == "__main__":
+    main()
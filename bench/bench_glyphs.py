@@ -0,0 +1,79 @@
+"""
+Host-side memory and update time of one 2-digit text: Label, bitmap_label and atlas.
+
+Needs the Blinka displayio port: pip install adafruit-blinka-displayio
+Run from the repo root: python bench/bench_glyphs.py
+"""
+
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import displayio  # noqa: E402
+import terminalio  # noqa: E402
+from adafruit_display_text import bitmap_label, label  # noqa: E402
+
+from clockface import MINUTES  # noqa: E402
+from glyphatlas import GlyphAtlas  # noqa: E402
+
+TEXTS = 12  # As many as the clock face has.
+UPDATES = 600
+
+
+def palette():
+    p = displayio.Palette(2)
+    p.make_transparent(0)
+    p[1] = 0xFFFFFF
+    return p
+
+
+def make_label(cls):
+    def make(_):
+        text = cls(terminalio.FONT, text="")
+        text._palette = palette()
+        return text
+
+    return make
+
+
+def measure(make):
+    """Return (bytes per text, microseconds per text update)."""
+    gc.collect()
+    tracemalloc.start()
+    texts = [make(i) for i in range(TEXTS)]
+    for t in texts:
+        t.text = "00"
+    used, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    for i in range(UPDATES):
+        texts[i % TEXTS].text = MINUTES[i % 60]
+    elapsed = time.perf_counter() - start
+    return used / TEXTS, elapsed / UPDATES * 1e6
+
+
+def main():
+    gc.collect()
+    tracemalloc.start()
+    atlas = GlyphAtlas(terminalio.FONT)
+    atlas_bytes, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    backends = (
+        ("label", make_label(label.Label)),
+        ("bitmap_label", make_label(bitmap_label.Label)),
+        ("atlas", lambda _: atlas.text(2, palette())),
+    )
+    for name, make in backends:
+        per_text, update = measure(make)
+        print("{:13s} {:7.0f} B/text {:9.1f} us/update".format(name, per_text, update))
+    print("(the atlas itself is {:.0f} B, shared by every text)".format(atlas_bytes))
+
+
+if __name__ == "__main__":
+    main()
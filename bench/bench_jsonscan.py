@@ -0,0 +1,75 @@
+"""
+Host-side peak heap of reading worldtimeapi replies: json.loads vs. jsonscan.extract.
+
+Uses the recorded replies in bench/fixtures, fed in 64 byte chunks as an ahttp.Response
+reads them from the socket.
+Run from the repo root: python bench/bench_jsonscan.py
+"""
+
+import glob
+import json
+import os
+import sys
+import tracemalloc
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+import jsonscan  # noqa: E402
+
+# The keys BasicApp.lookup_timezone asks for.
+TIME_KEYS = (
+    "dst",
+    "dst_from",
+    "dst_offset",
+    "dst_until",
+    "raw_offset",
+    "timezone",
+    "unixtime",
+)
+
+CHUNK_SIZE = 64
+
+
+def chunks(body):
+    for i in range(0, len(body), CHUNK_SIZE):
+        yield body[i : i + CHUNK_SIZE]
+
+
+def whole(body):
+    """What .json() does: read it all, then decode all of it."""
+    data = b"".join(chunks(body))
+    return json.loads(data)
+
+
+def streamed(body):
+    return jsonscan.extract(chunks(body), TIME_KEYS)
+
+
+def peak(fn, body):
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    fn(body)
+    _, result = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result
+
+
+def main():
+    for path in sorted(
+        glob.glob(os.path.join(HERE, "fixtures", "worldtimeapi_*.json"))
+    ):
+        with open(path, "rb") as f:
+            body = f.read().strip()
+        full = whole(body)
+        found = streamed(body)
+        assert found == {k: full[k] for k in TIME_KEYS}, found
+        print(
+            "{:31s} json {:5d} B  extract {:5d} B".format(
+                os.path.basename(path), peak(whole, body), peak(streamed, body)
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
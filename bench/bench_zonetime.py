@@ -0,0 +1,52 @@
+"""
+Host-side per-frame cost of the local time math: adafruit_datetime vs. ZoneTimes.
+
+Needs: pip install adafruit-circuitpython-datetime
+Run from the repo root: python bench/bench_zonetime.py
+"""
+
+import gc
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from adafruit_datetime import datetime, timedelta, timezone  # noqa: E402
+
+from zonetime import ZoneTimes  # noqa: E402
+
+OFFSETS = [-7 * 3600, 2 * 3600, 3 * 3600, 8 * 3600]
+FRAMES = 2000
+
+
+def datetime_frame(timezones):
+    """What time_group did per frame before."""
+    now = datetime.now()
+    return [(now + tz.utcoffset(None)).hour for tz in timezones], now.minute
+
+
+def measure(fn, *args):
+    """Return microseconds per frame."""
+    gc.collect()
+    start = time.perf_counter()
+    for _ in range(FRAMES):
+        fn(*args)
+    return (time.perf_counter() - start) / FRAMES * 1e6
+
+
+def main():
+    timezones = [timezone(timedelta(seconds=o)) for o in OFFSETS]
+    zone_times = ZoneTimes(len(OFFSETS))
+    zone_times.offsets[:] = OFFSETS
+
+    results = (
+        ("datetime", measure(datetime_frame, timezones)),
+        ("zonetime", measure(lambda: zone_times.update(int(time.time())))),
+    )
+    for name, usec in results:
+        print("{:9s} {:8.2f} us/frame".format(name, usec))
+
+
+if __name__ == "__main__":
+    main()
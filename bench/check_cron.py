@@ -0,0 +1,103 @@
+"""
+Check cron.Scheduler on a virtual clock: intervals, jobs returning their own delay,
+failures backing off, and rescheduling a job while it's running.
+
+Exits non-zero if a job runs at the wrong time.
+Run from the repo root: python bench/check_cron.py
+"""
+
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from host import fakes  # noqa: E402
+from host.clock import NS_PER_S, VirtualClock, VirtualEventLoop  # noqa: E402
+
+
+class App:
+    """Jobs that note when they ran, in whole seconds on the clock."""
+
+    def __init__(self, clock, scheduler) -> None:
+        self.clock = clock
+        self.cron = scheduler
+        self.runs = {}
+
+    def _ran(self, name: str) -> None:
+        self.runs.setdefault(name, []).append(self.clock.monotonic_ns() // NS_PER_S)
+
+    async def hourly(self):
+        self._ran("hourly")
+
+    async def adaptive(self):
+        self._ran("adaptive")
+        return 600
+
+    async def broken(self):
+        self._ran("broken")
+        raise OSError("No network")
+
+    async def slow(self):
+        self._ran("slow")
+        await asyncio.sleep(5)
+
+    async def poke(self):
+        """While slow is running, have it run again soon, as sync_soon does."""
+
+        await asyncio.sleep(3)
+        self.cron.reschedule("slow", 10)
+
+
+async def run(app, until: int) -> None:
+    """The sync task's loop: run what's due, sleep to the next deadline."""
+
+    while app.clock.monotonic_ns() < until * NS_PER_S:
+        await app.cron.run_due(app)
+        delay = app.cron.next_deadline() - app.clock.monotonic_ns()
+        await asyncio.sleep(max(0, delay) / NS_PER_S)
+
+
+async def scenario(app) -> None:
+    await asyncio.gather(run(app, 4000), app.poke())
+
+
+def main() -> int:
+    clock = VirtualClock(0)
+    fakes.install(clock)
+    import cron
+    import ringlog
+
+    fakes.use_clock(clock, cron, ringlog)
+    ringlog.log.echo = ringlog.ERROR + 1
+
+    scheduler = cron.Scheduler()
+    app = App(clock, scheduler)
+    scheduler.add("hourly", 3600)
+    scheduler.add("adaptive", 3600)
+    scheduler.add("broken", 3600)
+    scheduler.add("slow", 3600, delay=1)
+
+    loop = VirtualEventLoop(clock)
+    loop.run_until_complete(scenario(app))
+    loop.close()
+
+    expected = {
+        "hourly": [0, 3600],
+        "adaptive": [0, 600, 1200, 1800, 2400, 3000, 3600],
+        "broken": [0, 30, 90, 210, 450, 930, 1890, 3810],
+        # Rescheduled 2s into its first run, to 10s from then. That stands over its
+        # interval, which counts from the end of each run.
+        "slow": [1, 13, 3618],
+    }
+    failures = 0
+    for name, runs in expected.items():
+        if app.runs.get(name) != runs:
+            print("FAIL {}: ran at {}, not {}".format(name, app.runs.get(name), runs))
+            failures += 1
+    print("{} of {} jobs ran on time".format(len(expected) - failures, len(expected)))
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
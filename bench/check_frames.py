@@ -0,0 +1,115 @@
+"""
+Golden-frame and timing check of ZoneClock.time_group, on the host.
+
+Renders the clock at representative times (midnight, DST changes...) through the host
+stand-ins, compares each frame against bench/golden/*.ppm and times each build. Exits
+non-zero on a mismatch, or if rendering goes over budget.
+
+Needs: pip install adafruit-blinka-displayio numpy
+Run from the repo root: python bench/check_frames.py [--update]
+"""
+
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from host import fakes  # noqa: E402
+from host.clock import VirtualClock  # noqa: E402
+from host.framebuffer import read_ppm, write_ppm  # noqa: E402
+
+GOLDEN = os.path.join(ROOT, "bench", "golden")
+
+# name: UTC epoch seconds
+FRAMES = {
+    "ordinary": 1792320067,  # 2026-10-18 10:41:07
+    "utc_midnight": 1792368000,  # 2026-10-19 00:00:00
+    "la_midnight": 1792393200,  # 2026-10-19 07:00:00, midnight in LA
+    "us_spring_before": 1772963999,  # 2026-03-08 09:59:59
+    "us_spring_after": 1772964000,  # 2026-03-08 10:00:00, LA goes to PDT
+    "eu_spring_before": 1774745999,  # 2026-03-29 00:59:59
+    "eu_spring_after": 1774746000,  # 2026-03-29 01:00:00, DE and GR go to summer time
+    "eu_fall_after": 1792890000,  # 2026-10-25 01:00:00, back to winter time
+    "us_fall_after": 1793523600,  # 2026-11-01 09:00:00, LA back to PST
+}
+
+# Host budgets per backend, (build ms, frame us). Generous enough not to flake, tight
+# enough to catch something like a rebuild per frame. These frames jump hours apart, so
+# every label changes on each one, the worst case.
+BUDGETS = {
+    "label": (50, 5000),
+    "bitmap_label": (100, 20000),
+    "atlas": (100, 500),
+}
+
+
+def main(update: bool = False) -> int:
+    clock = VirtualClock(FRAMES["ordinary"])
+    fakes.install(clock)
+    import basic
+    import cron
+    import gcpolicy
+    import heapstats
+    import main as clock_main
+
+    fakes.use_clock(clock, basic, cron, clock_main)
+    fakes.use_gc(fakes.GC(), gcpolicy, heapstats)
+
+    failures = 0
+    for backend, (build_budget, frame_budget) in BUDGETS.items():
+        app = clock_main.ZoneClock(clock_main.TIMEZONES_to_SHOW, text_backend=backend)
+        times = []
+        blocks = []
+        build = None
+        for name, when in FRAMES.items():
+            clock.set(when)
+            app._second_edge = (when, clock.monotonic_ns())  # As if just synced.
+            app.update_offsets()  # Every zone has a TZ rule, no network.
+            gc.collect()
+            tracemalloc.start()
+            before = sys.getallocatedblocks()
+            start = time.perf_counter()
+            app.time_group()
+            elapsed = time.perf_counter() - start
+            blocks.append(sys.getallocatedblocks() - before)
+            tracemalloc.stop()
+            if build is None:
+                build = elapsed
+            else:
+                times.append(elapsed)
+
+            frame = app.display.frame()
+            path = os.path.join(GOLDEN, name + ".ppm")
+            if update and backend == "label":
+                write_ppm(path, frame)
+            elif not (read_ppm(path) == frame).all():
+                print("FAIL {} {}: frame differs from {}".format(backend, name, path))
+                failures += 1
+
+        frame_us = max(times) * 1e6
+        print(
+            "{:13s} build {:6.2f} ms, frame max {:7.1f} us, mean {:7.1f} us, "
+            "{:.1f} blocks/frame".format(
+                backend,
+                build * 1e3,
+                frame_us,
+                sum(times) / len(times) * 1e6,
+                sum(blocks[1:]) / len(times),
+            )
+        )
+        if build * 1e3 > build_budget:
+            print("FAIL {}: build over {} ms budget".format(backend, build_budget))
+            failures += 1
+        if frame_us > frame_budget:
+            print("FAIL {}: frame over {} us budget".format(backend, frame_budget))
+            failures += 1
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(update="--update" in sys.argv))
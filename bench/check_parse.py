@@ -0,0 +1,55 @@
+"""
+Check BasicApp.parse_time against the host's own date handling.
+
+Covers the worldtimeapi layouts, with and without a fraction and UTC offset, and
+strings that stop short of the seconds. Exits non-zero on a mismatch.
+Run from the repo root: python bench/check_parse.py
+"""
+
+import calendar
+import datetime
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from host import fakes  # noqa: E402
+from host.clock import VirtualClock  # noqa: E402
+
+# timestring: the local time it holds, as (year, month, day, hour, minute, second)
+CASES = {
+    "2026-10-18T10:41:07.123456-07:00": (2026, 10, 18, 10, 41, 7),
+    "2026-10-18T10:41:07+02:00": (2026, 10, 18, 10, 41, 7),
+    "2026-10-18T10:41:07": (2026, 10, 18, 10, 41, 7),
+    "2026-03-29T01:00:00.000000+00:00": (2026, 3, 29, 1, 0, 0),
+    "2026-12-31T23:59:59.999999+08:00": (2026, 12, 31, 23, 59, 59),
+    "2026-10-18T10:41": (2026, 10, 18, 10, 41, 0),  # No seconds.
+    "2026-10-18T10": (2026, 10, 18, 10, 0, 0),
+    "2026-10-18": (2026, 10, 18, 0, 0, 0),
+    "2026-10-18T10:41:07Z": (2026, 10, 18, 10, 41, 7),
+}
+
+
+def main() -> int:
+    clock = VirtualClock(0)
+    fakes.install(clock)
+    import basic
+
+    fakes.use_clock(clock, basic)
+
+    failures = 0
+    for timestring, expected in CASES.items():
+        parsed = basic.BasicApp.parse_time(None, timestring)
+        epoch = calendar.timegm(datetime.datetime(*expected).timetuple())
+        if tuple(parsed[:6]) != expected:
+            print("FAIL {}: parsed {}, not {}".format(timestring, parsed, expected))
+            failures += 1
+        elif clock.mktime(parsed) != epoch:
+            print("FAIL {}: epoch isn't {}".format(timestring, epoch))
+            failures += 1
+    print("{} of {} parsed right".format(len(CASES) - failures, len(CASES)))
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,37 @@
+"""
+Check how often the clock syncs when NTP is down, and only whole second sources
+(worldtimeapi, HTTP Date) are left: those can't meet TIME_ERROR_BOUND, so syncing
+every few minutes wouldn't help, and it should fall back to SYNC_INTERVAL.
+
+Runs a day of host.sim with no NTP, exits non-zero on more syncs than that allows.
+Run from the repo root: python bench/check_sync_rate.py
+"""
+
+import contextlib
+import io
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from host import sim  # noqa: E402
+
+DAYS = 1
+# Hourly, as before drift correction, is the most that's acceptable.
+MAX_PER_DAY = 24
+
+
+def main() -> int:
+    with contextlib.redirect_stdout(io.StringIO()):
+        _, network = sim.simulate(DAYS, sim.DEFAULT_START, 20_000, False, "label")
+    syncs = sum(1 for url in network.requests if url.endswith("/UTC"))
+    print(
+        "{} worldtimeapi syncs in {} day(s) with no NTP, at most {} a day".format(
+            syncs, DAYS, MAX_PER_DAY
+        )
+    )
+    return 1 if syncs > MAX_PER_DAY * DAYS else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
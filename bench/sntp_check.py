@@ -0,0 +1,67 @@
+"""
+Run sntp.query against a stand-in NTP responder on localhost.
+
+The responder answers from the host clock after an artificial delay on each leg, so
+this shows how well the round-trip compensation recovers the true time.
+Run from the repo root: python bench/sntp_check.py
+"""
+
+import os
+import socket
+import struct
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import sntp  # noqa: E402
+
+DELAY = 0.050  # Seconds, each way.
+QUERIES = 10
+
+
+def ntp_timestamp(unix_ns):
+    seconds, ns = divmod(unix_ns, sntp.NS_PER_S)
+    return struct.pack("!II", seconds + sntp.NTP_TO_UNIX, (ns << 32) // sntp.NS_PER_S)
+
+
+def responder(server):
+    while True:
+        request, address = server.recvfrom(sntp.NTP_PACKET_SIZE)
+        time.sleep(DELAY)
+        received = ntp_timestamp(time.time_ns())
+        reply = bytearray(sntp.NTP_PACKET_SIZE)
+        reply[0] = 0b00_011_100  # Version 3, server
+        reply[1] = 1  # Stratum
+        reply[24:32] = request[40:48]
+        reply[32:40] = received
+        reply[40:48] = ntp_timestamp(time.time_ns())
+        time.sleep(DELAY)
+        server.sendto(reply, address)
+
+
+def main():
+    server = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    server.bind(("127.0.0.1", 0))
+    threading.Thread(target=responder, args=(server,), daemon=True).start()
+
+    client = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    client.settimeout(2)
+    client.connect(server.getsockname())
+
+    errors = []
+    for _ in range(QUERIES):
+        unix_ns, monotonic_ns, round_trip = sntp.query(client)
+        truth = time.time_ns() - (time.monotonic_ns() - monotonic_ns)
+        errors.append(abs(unix_ns - truth))
+    print("round trip {:.1f} ms".format(round_trip / 1e6))
+    print(
+        "error: max {:.3f} ms, mean {:.3f} ms".format(
+            max(errors) / 1e6, sum(errors) / len(errors) / 1e6
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""
+The retained-mode clock face: build the labels once, then only poke the ones that change.
+"""
+
+import displayio
+from adafruit_display_text.label import Label
+
+# Every string the face can ever show, so a tick never has to format one.
+HOURS = tuple("{:2d}".format(h) for h in range(24))
+MINUTES = tuple("{:02d}".format(m) for m in range(60))
+
+LINE_HEIGHT = 8
+
+# The ways the face can draw its text:
+#   label: adafruit_display_text Label, a TileGrid per glyph
+#   bitmap_label: adafruit_display_text bitmap_label, one Bitmap per text
+#   atlas: a TileGrid per text into one shared GlyphAtlas
+TEXT_BACKENDS = ("label", "bitmap_label", "atlas")
+
+
+def shared_palette(label_class):
+    """A subclass of adafruit_display_text's `label_class` drawn with a `palette`
+    passed in, which other labels can share.
+
+    The library has no way to pass one in, so this swaps its private `_palette`, the
+    only place that's done. The library's pinned for it, see pyproject.toml. Setting
+    `color` on one would change every label sharing its palette, so it raises."""
+
+    class SharedPaletteLabel(label_class):
+        def __init__(self, font, palette, text: str = "", **kwargs) -> None:
+            self._shared = False
+            super().__init__(font, text="", **kwargs)
+            # The TileGrids are built with the palette when there's text, so swap it
+            # in before there's any.
+            self._palette = palette
+            self._shared = True
+            self.text = text
+
+        @property
+        def color(self) -> int:
+            return self._palette[1]
+
+        @color.setter
+        def color(self, value: int) -> None:
+            if self._shared:
+                raise AttributeError("Shared palette, see ClockFace.set_color()")
+            label_class.color.fset(self, value)
+
+    return SharedPaletteLabel
+
+
+class ClockFace:
+    """A display group of hour/minute/country labels that lives for the life of the app.
+
+    `rows` is a list of (country_code, flag_colors) tuples, one per zone. The first
+    row shows the minutes, the rest show their country code instead.
+
+    Every label with the same flag color shares one displayio.Palette, so brightness
+    or fading is a palette write per color, without touching a single label.
+    `refresh` is called after those writes, for a display that doesn't auto refresh.
+    """
+
+    def __init__(
+        self, font, rows: list, color, backend: str = "label", refresh=None
+    ) -> None:
+        self.font = font
+        self.rows = rows
+        self.color = color  # Function that applies brightness to a hex color.
+        self.refresh = refresh
+
+        # Only the backend in use is imported, they all cost RAM to load.
+        self.backend = backend
+        self.atlas = None
+        if backend == "label":
+            self.label_class = shared_palette(Label)
+        elif backend == "bitmap_label":
+            from adafruit_display_text.bitmap_label import Label as BitmapLabel
+
+            self.label_class = shared_palette(BitmapLabel)
+        elif backend == "atlas":
+            from glyphatlas import GlyphAtlas
+
+            self.atlas = GlyphAtlas(font)
+        else:
+            raise ValueError("Unknown text backend: {}".format(backend))
+
+        self.group = displayio.Group(x=0, y=4)
+        self.hour_labels = []
+        self.minute_label = None
+        self._hours = [None] * len(rows)
+        self._minute = None
+        # Flag color: the palette every glyph in that color is drawn with.
+        self.palettes = {}
+
+        font_width, _ = self.font.get_bounding_box()
+        font_width -= 1
+
+        for i, (country_code, flag_colors) in enumerate(rows):
+            y = i * LINE_HEIGHT
+
+            # First we show the hours
+            hour_label = self._label("", flag_colors[0], 0, y, 2)
+            self.hour_labels.append(hour_label)
+
+            # What comes next depends on the row:
+            if i == 0:
+                # First row has the actual minutes of the hour
+                self._label(":", flag_colors[1], font_width * 2, y - 1)
+                self.minute_label = self._label(
+                    "", flag_colors[2], font_width * 2 + 4, y, 2
+                )
+            else:
+                # Every other row, instead of the minutes, the country code is shown.
+                self._label(country_code[0], flag_colors[1], font_width * 2 + 4, y)
+                self._label(country_code[1], flag_colors[2], font_width * 3 + 5, y)
+
+    def palette(self, color_in_hex: int) -> displayio.Palette:
+        """The shared palette for a flag color, made on first use."""
+
+        palette = self.palettes.get(color_in_hex)
+        if palette is None:
+            palette = displayio.Palette(2)
+            palette[0] = 0
+            palette.make_transparent(0)
+            palette[1] = self.color(color_in_hex)
+            self.palettes[color_in_hex] = palette
+        return palette
+
+    def _label(self, text: str, color_in_hex: int, x: int, y: int, length: int = 1):
+        if self.atlas is not None:
+            atlas_text = self.atlas.text(length, self.palette(color_in_hex), x, y)
+            atlas_text.text = text
+            self.group.append(atlas_text.tilegrid)
+            return atlas_text
+
+        label = self.label_class(
+            self.font, self.palette(color_in_hex), text=text, x=x, y=y
+        )
+        self.group.append(label)
+        return label
+
+    def update(self, hours: list, minute: int) -> int:
+        """Show new hours (one per row) and minute. Returns how many labels changed.
+
+        Labels whose value is unchanged aren't touched, since setting `.text` always
+        rebuilds the glyphs even when it's the same string."""
+
+        changed = 0
+        for i in range(len(hours)):
+            hour = hours[i]
+            if self._hours[i] != hour:
+                self.hour_labels[i].text = HOURS[hour]
+                self._hours[i] = hour
+                changed += 1
+
+        if self._minute != minute:
+            self.minute_label.text = MINUTES[minute]
+            self._minute = minute
+            changed += 1
+
+        return changed
+
+    def recolor(self) -> None:
+        """Re-apply brightness to every flag color, for when it's changed."""
+
+        for color_in_hex, palette in self.palettes.items():
+            palette[1] = self.color(color_in_hex)
+        if self.refresh is not None:
+            self.refresh()
+
+    def set_color(self, color_in_hex: int, shown: int) -> None:
+        """Show everything drawn in flag color `color_in_hex` as `shown` instead.
+
+        For fades and the like, `recolor()` puts it back."""
+
+        self.palettes[color_in_hex][1] = shown
+        if self.refresh is not None:
+            self.refresh()
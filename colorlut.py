@@ -0,0 +1,61 @@
+"""
+Brightness and gamma for colors, done once per brightness as lookup tables.
+
+The LEDs are linear in light, while color values are gamma encoded, so scaling the
+values straight down squashes the darker colors together. The tables here decode
+gamma, apply brightness and round to the levels the panel can really show.
+"""
+
+GAMMA = 2.2
+
+
+def channel_table(brightness: float, gamma: float, bits: int) -> bytes:
+    """A 256 entry table from color value to panel value for one channel.
+
+    The panel only uses the top `bits` of each value, so outputs are rounded to a
+    level it can show, rather than left for it to truncate."""
+
+    step = 1 << (8 - bits)
+    top = 256 - step
+    table = bytearray(256)
+    for v in range(256):
+        linear = top * brightness * (v / 255) ** gamma
+        level = int(round(linear / step)) * step
+        if level == 0 and linear >= step / 4:
+            level = step  # A lit color going fully dark is worse than too bright.
+        table[v] = level
+    return bytes(table)
+
+
+class ColorTable:
+    """Scales 0xRRGGBB colors for one brightness, with a cache of the ones used."""
+
+    def __init__(self, brightness: float, gamma=GAMMA, bits: int = 6) -> None:
+        self.brightness = brightness
+        # gamma can be one number, or one per channel for (r, g, b).
+        gammas = gamma if isinstance(gamma, tuple) else (gamma, gamma, gamma)
+        tables = {}
+        for g in gammas:
+            if g not in tables:
+                tables[g] = channel_table(brightness, g, bits)
+        self.red, self.green, self.blue = (tables[g] for g in gammas)
+        self._cache = {}
+
+    def color(self, color_in_hex: int) -> int:
+        """The panel color for `color_in_hex` at this brightness."""
+
+        scaled = self._cache.get(color_in_hex)
+        if scaled is None:
+            scaled = (
+                self.red[color_in_hex >> 16] << 16
+                | self.green[color_in_hex >> 8 & 0xFF] << 8
+                | self.blue[color_in_hex & 0xFF]
+            )
+            self._cache[color_in_hex] = scaled
+        return scaled
+
+    def prime(self, palette) -> None:
+        """Fill the cache for every color in `palette`, an iterable of colors."""
+
+        for color_in_hex in palette:
+            self.color(color_in_hex)
@@ -0,0 +1,158 @@
+"""
+A tiny cron: jobs kept in a min-heap on their next monotonic deadline.
+
+Deadlines are time.monotonic_ns(), so setting the RTC can't make a job run twice or not
+at all. There's no heapq on the board, hence the little heap here.
+"""
+
+import random
+import time
+
+import asyncio
+
+from ringlog import log
+
+NS_PER_S = 1_000_000_000
+# First retry of a failed job after this many seconds, doubling each time after.
+RETRY_BASE = 30
+# A job still running after this long is cancelled, and counts as failed.
+JOB_TIMEOUT = 60
+# Log each job's failures at most this often, as retries can go on for hours.
+FAILURE_LOG_EVERY = 10 * 60  # Seconds
+
+
+class Job:
+    """An async method name to call on the app every `interval` seconds."""
+
+    def __init__(self, name: str, interval: int, jitter: int) -> None:
+        self.name = name
+        self.interval = interval
+        self.jitter = jitter
+        self.deadline = 0
+        self.failures = 0
+        # Running right now, so out of the heap until it's done.
+        self.running = False
+        # Rescheduled while running, so `deadline` stands over the usual interval.
+        self.rescheduled = False
+
+
+class Scheduler:
+    """Runs an app's jobs when they're due, soonest first.
+
+    Jobs are coroutines, so they can wait on the network without holding anything up.
+    A job can return how many seconds until it next runs, instead of its interval.
+    Jobs that raise or time out are retried with exponential backoff (capped at their
+    interval) and never take the caller down with them.
+    """
+
+    def __init__(self) -> None:
+        self._heap = []
+        self._jobs = {}
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._jobs
+
+    def add(self, name: str, interval: int, jitter: int = 0, delay: int = 0) -> None:
+        """Run method `name` every `interval` seconds, the first time in `delay`.
+
+        Each run after the first is pushed back by up to `jitter` seconds, so
+        jobs with the same interval don't all hit the network at once."""
+
+        job = Job(name, interval, jitter)
+        job.deadline = time.monotonic_ns() + delay * NS_PER_S
+        self._jobs[name] = job
+        self._push(job)
+
+    def reschedule(self, name: str, delay: int) -> None:
+        """Move job `name` to run `delay` seconds from now. If it's running, that's
+        when it next runs after this run."""
+
+        job = self._jobs[name]
+        job.deadline = time.monotonic_ns() + delay * NS_PER_S
+        if job.running:
+            job.rescheduled = True  # run_due puts it back when it's done.
+            return
+        self._heap.remove(job)
+        for i in range(len(self._heap) // 2 - 1, -1, -1):
+            self._sift_down(i)
+        self._push(job)
+
+    def next_deadline(self):
+        """The time.monotonic_ns() the next job is due, or None with no jobs."""
+
+        return self._heap[0].deadline if self._heap else None
+
+    async def run_due(self, app) -> int:
+        """Run every job on `app` that's due, one after the other, returns how many
+        ran."""
+
+        ran = 0
+        now = time.monotonic_ns()
+        while self._heap and self._heap[0].deadline <= now:
+            job = self._pop()
+            log.info("Running scheduled job: {0}", job.name)
+            job.running = True
+            job.rescheduled = False
+            try:
+                delay = await asyncio.wait_for(getattr(app, job.name)(), JOB_TIMEOUT)
+            except Exception as e:  # pylint: disable=broad-except
+                job.failures += 1
+                delay = min(job.interval, RETRY_BASE << (job.failures - 1))
+                log.warning(
+                    "Job {0} failed ({1!r}), retry in {2}s",
+                    job.name,
+                    e,
+                    delay,
+                    every=FAILURE_LOG_EVERY,
+                    key=job.name,
+                )
+            else:
+                job.failures = 0
+                if delay is None:
+                    delay = job.interval
+                if job.jitter:
+                    delay += random.randint(0, job.jitter)
+            job.running = False
+            if not job.rescheduled:
+                job.deadline = time.monotonic_ns() + delay * NS_PER_S
+            self._push(job)
+            ran += 1
+        return ran
+
+    def _push(self, job: Job) -> None:
+        heap = self._heap
+        heap.append(job)
+        i = len(heap) - 1
+        while i > 0:
+            parent = (i - 1) // 2
+            if heap[parent].deadline <= job.deadline:
+                break
+            heap[i] = heap[parent]
+            i = parent
+        heap[i] = job
+
+    def _pop(self) -> Job:
+        heap = self._heap
+        last = heap.pop()
+        if not heap:
+            return last
+        top = heap[0]
+        heap[0] = last
+        self._sift_down(0)
+        return top
+
+    def _sift_down(self, i: int) -> None:
+        heap = self._heap
+        job = heap[i]
+        size = len(heap)
+        while True:
+            child = 2 * i + 1
+            if child >= size:
+                break
+            if child + 1 < size and heap[child + 1].deadline < heap[child].deadline:
+                child += 1
+            if job.deadline <= heap[child].deadline:
+                break
+            heap[i] = heap[child]
+            i = child
+        heap[i] = job
@@ -0,0 +1,88 @@
+"""
+Learn how fast the board's clock drifts, to correct for it between syncs.
+
+Each sync measures how far the clock wandered since the one before. Strung together,
+those are the offset of a clock that was never set, which is a straight line for a
+steady drift: its slope, fitted by least squares over the last few syncs, is the
+drift rate. How well the points fit says how long the corrected clock can be trusted,
+so how long until the next sync.
+"""
+
+NS_PER_S = 1_000_000_000
+# Syncs fitted, so a drift that changes with the seasons is followed.
+HISTORY = 8
+# How far off the drift could be before there's anything to go on, 50ppm.
+UNKNOWN_PPB = 50_000
+MIN_INTERVAL = 10 * 60  # Seconds
+MAX_INTERVAL = 12 * 60 * 60  # Seconds
+
+
+class DriftEstimator:
+    """A least squares fit of the clock's error over the last HISTORY syncs.
+
+    `rate_ppb` is how fast the clock gains (ns per second), `uncertainty_ppb` how far
+    that could be out."""
+
+    def __init__(self, rate_ppb: int = 0) -> None:
+        self.rate_ppb = rate_ppb
+        self.uncertainty_ppb = UNKNOWN_PPB
+        # (Unix seconds, error ns of a never set clock, error bound ns)
+        self.points = []
+
+    def add(self, since: int, now: int, error_ns: int, bound_ns: int = 0) -> None:
+        """Record that at Unix seconds `now` the clock was `error_ns` fast, give or
+        take `bound_ns`, having been set right at `since`."""
+
+        points = self.points
+        if not points or points[-1][0] != since:
+            # Not carrying on from the last sync, so start over from this one.
+            points[:] = [(since, 0, bound_ns)]
+        points.append((now, points[-1][1] + error_ns, bound_ns))
+        del points[:-HISTORY]
+        self._fit()
+
+    def _fit(self) -> None:
+        points = self.points
+        n = len(points)
+        # Relative to the first point, as floats can't hold Unix nanoseconds.
+        x0, y0, _ = points[0]
+        mean_x = sum(p[0] - x0 for p in points) / n
+        mean_y = sum(p[1] - y0 for p in points) / n
+        sxx = sxy = 0.0
+        for x, y, _ in points:
+            dx = x - x0 - mean_x
+            sxx += dx * dx
+            sxy += dx * (y - y0 - mean_y)
+        if sxx <= 0:
+            return
+        slope = sxy / sxx
+        self.rate_ppb = int(slope)
+
+        # The scatter about the line, but no less than the syncs claim to be good to.
+        variance = sum(p[2] * p[2] for p in points) / n
+        if n > 2:
+            residuals = 0.0
+            for x, y, _ in points:
+                r = y - y0 - mean_y - slope * (x - x0 - mean_x)
+                residuals += r * r
+            variance = max(variance, residuals / (n - 2))
+        self.uncertainty_ppb = int((variance / sxx) ** 0.5)
+
+    def correction_ns(self, elapsed_ns: int) -> int:
+        """How far the clock will have gained after running `elapsed_ns` since it
+        was set."""
+
+        return elapsed_ns * self.rate_ppb // NS_PER_S
+
+    def next_interval(self, bound_ns: int, sync_error_ns: int = 0) -> int:
+        """Seconds until the corrected clock could be `bound_ns` out, from a sync
+        good to `sync_error_ns`. Between MIN_INTERVAL and MAX_INTERVAL.
+
+        None if the sync itself was worse than `bound_ns`, as syncing sooner won't
+        help, so the caller can fall back to its usual interval."""
+
+        spare = bound_ns - sync_error_ns
+        if spare <= 0:
+            return None
+        interval = spare // max(1, self.uncertainty_ppb)
+        return max(MIN_INTERVAL, min(MAX_INTERVAL, interval))
@@ -0,0 +1,42 @@
+"""
+When to collect garbage: once enough has been allocated to be worth it, not every loop.
+
+A full collection on the board takes milliseconds whether or not there's anything to
+free, and the loop allocates very little per frame, so most of the collections it used
+to do every loop were for nothing.
+"""
+
+import gc
+
+# Collect once this much has been allocated since the last collection.
+THRESHOLD = 16 * 1024
+# Where gc.threshold() is available, have the VM collect by itself after this much,
+# so a long network job can't run the heap dry between our collections.
+VM_THRESHOLD = 4 * THRESHOLD
+
+
+class GCPolicy:
+    """Collects when allocation since the last collection passes `threshold` bytes,
+    or before something heavy is about to run."""
+
+    def __init__(self, threshold: int = THRESHOLD) -> None:
+        self.threshold = threshold
+        self.collections = 0
+        self.skipped = 0
+        if hasattr(gc, "threshold"):
+            gc.threshold(VM_THRESHOLD)
+        self.collect()
+
+    def collect(self) -> None:
+        gc.collect()
+        self.collections += 1
+        self._live = gc.mem_alloc()
+
+    def maybe_collect(self) -> bool:
+        """Collect if enough has been allocated since last time. Returns if it did."""
+
+        if gc.mem_alloc() - self._live >= self.threshold:
+            self.collect()
+            return True
+        self.skipped += 1
+        return False
@@ -0,0 +1,103 @@
+"""
+A glyph atlas: the few characters the clock draws, rasterised once into a shared bitmap.
+
+Each piece of text is then a TileGrid into the atlas, one tile per character, so changing
+a digit is setting one tile index. Far lighter than a Label, which carries a group and a
+TileGrid per glyph and rebuilds them all whenever its text is set.
+"""
+
+import displayio
+
+# What the clock can ever show: the time, and the country codes.
+CLOCK_CHARS = " 0123456789:ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+
+class GlyphAtlas:
+    """One 1-bit bitmap holding a fixed size cell for each character in `chars`.
+
+    Glyphs sit in their cells where a Label would put them relative to its baseline,
+    so an AtlasText lines up with a Label at the same x, y.
+    """
+
+    def __init__(self, font, chars: str = CLOCK_CHARS) -> None:
+        self.font = font
+        self.chars = chars
+
+        # The same sums Label does, to find the ascent and descent of the font.
+        ascent = descent = 0
+        for c in "M j'":
+            glyph = font.get_glyph(ord(c))
+            if glyph:
+                ascent = max(ascent, glyph.height + glyph.dy)
+                descent = max(descent, -glyph.dy)
+        self.ascent = ascent
+        self.y_offset = ascent // 2  # Where Label puts y, down from the top.
+        self.cell_width = font.get_bounding_box()[0]
+        self.cell_height = ascent + descent
+
+        self.bitmap = displayio.Bitmap(
+            self.cell_width * len(chars), self.cell_height, 2
+        )
+        self.tiles = {}
+        for i, c in enumerate(chars):
+            self.tiles[c] = i
+            glyph = font.get_glyph(ord(c))
+            if glyph:
+                self._blit(glyph, i * self.cell_width)
+
+    def _blit(self, glyph, cell_x: int) -> None:
+        source = glyph.bitmap
+        per_row = source.width // glyph.width
+        source_x = glyph.tile_index % per_row * glyph.width
+        source_y = glyph.tile_index // per_row * glyph.height
+        top = self.ascent - glyph.height - glyph.dy
+        for y in range(glyph.height):
+            if not 0 <= top + y < self.cell_height:
+                continue
+            for x in range(glyph.width):
+                if (
+                    0 <= glyph.dx + x < self.cell_width
+                    and source[source_x + x, source_y + y]
+                ):
+                    self.bitmap[cell_x + glyph.dx + x, top + y] = 1
+
+    def text(self, length: int, palette, x: int = 0, y: int = 0) -> "AtlasText":
+        return AtlasText(self, length, palette, x, y)
+
+
+class AtlasText:
+    """A fixed width run of characters from a GlyphAtlas, placed like a Label.
+
+    Add `tilegrid` to a group to show it. Text longer than `length` is cut off,
+    shorter is padded with blanks."""
+
+    def __init__(self, atlas: GlyphAtlas, length: int, palette, x: int, y: int):
+        self.tilegrid = displayio.TileGrid(
+            atlas.bitmap,
+            pixel_shader=palette,
+            width=length,
+            height=1,
+            tile_width=atlas.cell_width,
+            tile_height=atlas.cell_height,
+            default_tile=atlas.tiles[" "],
+            x=x,
+            y=y + atlas.y_offset - atlas.ascent,
+        )
+        self._atlas = atlas
+        self._length = length
+        self._text = ""
+
+    @property
+    def text(self) -> str:
+        return self._text
+
+    @text.setter
+    def text(self, text: str) -> None:
+        tiles = self._atlas.tiles
+        blank = tiles[" "]
+        grid = self.tilegrid
+        for i in range(self._length):
+            tile = tiles.get(text[i], blank) if i < len(text) else blank
+            if grid[i] != tile:
+                grid[i] = tile
+        self._text = text
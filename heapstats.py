@@ -0,0 +1,132 @@
+"""
+How the heap is doing: high-water marks for each phase of the loop, and a watch on free
+memory and fragmentation, so the app can reset itself cleanly before a MemoryError does
+it messily.
+"""
+
+import gc
+
+NS_PER_S = 1_000_000_000
+
+# Look for the largest free block this often. It takes a dozen allocations and
+# collections, so not every loop.
+BLOCK_INTERVAL = 10 * 60  # Seconds
+# Only look for blocks up to this big, we care about them getting small.
+BLOCK_PROBE_MAX = 64 * 1024
+# Block samples kept for the trend, an hour of them.
+HISTORY = 6
+
+# Reset once free memory after a collection, or the largest block, is under these.
+RESET_FREE = 8 * 1024
+RESET_BLOCK = 2 * 1024
+
+
+def largest_block(limit: int = BLOCK_PROBE_MAX) -> int:
+    """The largest bytearray that can be allocated right now, up to `limit` bytes.
+
+    Found by trying, to within 64 bytes. Each block that fits is garbage straight
+    away, so it's collected before the next try."""
+
+    low, high = 0, limit + 1
+    while high - low > 64:
+        size = (low + high) // 2
+        try:
+            block = bytearray(size)
+        except MemoryError:
+            high = size
+        else:
+            del block
+            gc.collect()
+            low = size
+    return low
+
+
+class HeapStats:
+    """Per phase high-water marks of allocated memory, and the most each phase grew it.
+
+    Laps line up with LoopStats, which calls these when the heap is being watched."""
+
+    def __init__(self) -> None:
+        self.peak = {}
+        self.growth = {}
+        self._alloc = 0
+
+    def start(self) -> None:
+        self._alloc = gc.mem_alloc()
+
+    def lap(self, name: str) -> None:
+        alloc = gc.mem_alloc()
+        if alloc > self.peak.get(name, 0):
+            self.peak[name] = alloc
+        grew = alloc - self._alloc
+        if grew > self.growth.get(name, 0):
+            self.growth[name] = grew
+        self._alloc = alloc
+
+    def print_report(self, names: list) -> None:
+        for name in names:
+            if name in self.peak:
+                print(
+                    "{:8s} peak={}B grew={}B".format(
+                        name, self.peak[name], self.growth.get(name, 0)
+                    )
+                )
+
+
+class HeapWatch:
+    """Free memory after each collection, and the largest block now and then.
+
+    check() says when to reset: when either is already too low, or free memory has
+    fallen every sample for the last hour and looks like it'll be too low within
+    the next interval."""
+
+    def __init__(self) -> None:
+        self.low_free = None
+        self.free = None
+        self.block = None
+        # (monotonic seconds, free, largest block), oldest first.
+        self.history = []
+        self._next_block = 0
+
+    def check(self, now: int) -> str:
+        """Call after a gc.collect(), with the monotonic time in seconds.
+
+        Returns why the app should reset, or None if all's well."""
+
+        free = gc.mem_free()
+        self.free = free
+        if self.low_free is None or free < self.low_free:
+            self.low_free = free
+
+        if now >= self._next_block:
+            self._next_block = now + BLOCK_INTERVAL
+            self.block = largest_block(min(free, BLOCK_PROBE_MAX))
+            self.history.append((now, free, self.block))
+            if len(self.history) > HISTORY:
+                self.history.pop(0)
+
+        if free < RESET_FREE:
+            return "free memory is {}B".format(free)
+        if self.block is not None and self.block < RESET_BLOCK:
+            return "largest block is {}B".format(self.block)
+        if len(self.history) == HISTORY:
+            falling = True
+            for i in range(1, HISTORY):
+                if self.history[i][1] >= self.history[i - 1][1]:
+                    falling = False
+                    break
+            if falling:
+                first, last = self.history[0], self.history[-1]
+                rate = (first[1] - last[1]) / (last[0] - first[0])
+                if free - rate * BLOCK_INTERVAL < RESET_FREE:
+                    return "free memory falling {:.0f}B/s".format(rate)
+        return None
+
+    def print_report(self) -> None:
+        print(
+            "free={}B low={}B largest block={}B".format(
+                self.free, self.low_free, self.block
+            )
+        )
+        for when, free, block in self.history:
+            print("  at {}s free={}B block={}B".format(when, free, block))
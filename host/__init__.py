@@ -0,0 +1,6 @@
+"""
+Host stand-ins for the board, so the clock can be run and checked on a PC.
+
+Call `fakes.install()` before importing main or basic. displayio and terminalio come
+from the Blinka displayio port: pip install adafruit-blinka-displayio numpy
+"""
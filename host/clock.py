@@ -0,0 +1,102 @@
+"""
+A virtual clock that stands in for the `time` module, and only moves when told to.
+"""
+
+import asyncio
+import calendar
+import math
+import selectors
+import time as _time
+
+NS_PER_S = 1_000_000_000
+
+
+class SimulationOver(Exception):
+    """Raised from sleep() once the clock passes its `end`."""
+
+
+class VirtualClock:
+    """True time, the RTC (wall) and monotonic time, all in ns, under our control.
+
+    Assign it over the `time` of the modules under test. sleep() advances time
+    instead of waiting, so days run in seconds. The RTC and monotonic time can be made
+    to drift from true time by `drift_ppb`, as the board's do: on the SAMD51 both
+    count the same 32kHz clock.
+    """
+
+    struct_time = _time.struct_time
+
+    def __init__(self, start: int, drift_ppb: int = 0, end: int = None) -> None:
+        self.true_ns = start * NS_PER_S
+        self.wall_ns = start * NS_PER_S
+        self.monotonic_ns_ = 0
+        self.drift_ppb = drift_ppb
+        self.end_ns = None if end is None else end * NS_PER_S
+
+    def set(self, when: int) -> None:
+        """Set the wall clock to epoch seconds `when`, like setting the RTC."""
+
+        self.wall_ns = when * NS_PER_S
+
+    def advance(self, ns: int) -> None:
+        """Move true time on by `ns`, and the board's clocks by that plus drift."""
+
+        drifted = ns + ns * self.drift_ppb // NS_PER_S
+        self.true_ns += ns
+        self.monotonic_ns_ += drifted
+        self.wall_ns += drifted
+
+    # The `time` module API the app uses
+
+    def time(self) -> int:
+        return self.wall_ns // NS_PER_S  # The RTC only has whole seconds.
+
+    def monotonic_ns(self) -> int:
+        return self.monotonic_ns_
+
+    def monotonic(self) -> float:
+        return self.monotonic_ns_ / NS_PER_S
+
+    def sleep(self, seconds: float) -> None:
+        self.sleep_ns(int(seconds * NS_PER_S))
+
+    def sleep_ns(self, ns: int) -> None:
+        if self.end_ns is not None and self.true_ns >= self.end_ns:
+            raise SimulationOver()
+        # `ns` on the board's clock, rounded up so it always moves.
+        self.advance(-(-ns * NS_PER_S // (NS_PER_S + self.drift_ppb)))
+
+    def localtime(self, secs=None):
+        return _time.gmtime(self.time() if secs is None else secs)
+
+    def mktime(self, t) -> int:
+        return calendar.timegm(t)
+
+
+class _VirtualSelector(selectors.SelectSelector):
+    """Waits out select() timeouts by advancing the clock, not by waiting."""
+
+    def __init__(self, clock: VirtualClock) -> None:
+        super().__init__()
+        self.clock = clock
+
+    def select(self, timeout=None):
+        if timeout is None:
+            raise RuntimeError("Nothing scheduled, the event loop would wait forever")
+        if timeout > 0:
+            # Rounded up, or a timeout under 1ns would never pass.
+            self.clock.sleep_ns(math.ceil(timeout * NS_PER_S))
+        return super().select(0)
+
+
+class VirtualEventLoop(asyncio.SelectorEventLoop):
+    """An asyncio event loop on a VirtualClock, so asyncio.sleep() takes no time.
+
+    Raises SimulationOver out of run_until_complete() once the clock is past its end."""
+
+    def __init__(self, clock: VirtualClock) -> None:
+        super().__init__(_VirtualSelector(clock))
+        self.clock = clock
+
+    def time(self) -> float:
+        return self.clock.monotonic()
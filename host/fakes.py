@@ -0,0 +1,377 @@
+"""
+Stand-in modules for the hardware main.py and basic.py import, installed in sys.modules.
+
+Only as much of each as the clock uses. The display is real Blinka displayio, with a
+fake Matrix whose display can be rasterised to a NumPy array.
+"""
+
+import calendar
+import email.utils
+import gc
+import os
+import struct
+import sys
+import tracemalloc
+import types
+
+from host import tz
+from host.clock import NS_PER_S
+from host.framebuffer import rasterise
+
+FIXTURES = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "bench", "fixtures"
+)
+WIFI_TEST_TEXT = (
+    "This is a test of Adafruit WiFi!\nIf you can read this, its working :)"
+)
+
+
+class Network:
+    """Answers HTTP GETs from recorded replies, and counts them. And lets the ESP32
+    join after `join_delay` seconds, unless it's one of the first `join_failures`
+    tries.
+
+    Given a clock, worldtimeapi replies are made for its true time from the host's
+    zoneinfo instead, in the same layout as the recorded ones, and replies over
+    sockets take `latency` seconds to come back. Every `stall_every`th socket request
+    stalls for `stall` seconds on top, as a struggling access point does. NTP servers
+    named in `ntp_offsets` answer that many seconds off the true time. DNS lookups
+    block for `dns_delay` seconds, and TCP connects for `latency`, as on the ESP32."""
+
+    def __init__(
+        self,
+        clock=None,
+        latency: float = 0.04,
+        stall: float = 0,
+        stall_every: int = 0,
+        join_delay: float = 2,
+        join_failures: int = 0,
+        ntp_offsets: dict = None,
+        dns_delay: float = 0.1,
+    ) -> None:
+        self.clock = clock
+        self.ntp_offsets = ntp_offsets or {}
+        self.join_delay = join_delay
+        self.join_failures = join_failures
+        self.joins = 0
+        self.requests = []
+        self.ntp_requests = 0
+        self.latency = latency
+        self.stall = stall
+        self.stall_every = stall_every
+        self.stalls = 0
+        self._socket_requests = 0
+        self.dns_delay = dns_delay
+        self.lookups = 0
+        # Host name by the made up address it was given, in lookup order.
+        self.hosts = []
+
+    def address(self, host: str) -> bytes:
+        """The address of `host`, made up the first time it's asked for."""
+
+        if host not in self.hosts:
+            self.hosts.append(host)
+        return bytes((10, 0, 0, self.hosts.index(host) + 1))
+
+    def host(self, address) -> str:
+        """The host name behind `address`, or `address` if it's already a name."""
+
+        if isinstance(address, str):
+            return address
+        return self.hosts[address[3] - 1]
+
+    def reply(self, url: str, when: int) -> bytes:
+        """The body of the reply to GET `url`, as the server would send at `when`."""
+
+        if url.endswith("/testwifi/index.html"):
+            return WIFI_TEST_TEXT.encode()
+        if "/api/timezone/" in url:
+            return self.worldtimeapi(url.split("/api/timezone/", 1)[1], when)
+        raise OSError("No stand-in for {}".format(url))
+
+    def worldtimeapi(self, name: str, when: int = None) -> bytes:
+        if when is not None:
+            return tz.worldtimeapi_reply(name, when)
+        path = os.path.join(
+            FIXTURES, "worldtimeapi_{}.json".format(name.split("/")[-1].lower())
+        )
+        with open(path, "rb") as f:
+            return f.read().strip()
+
+    def delay_ns(self) -> int:
+        """How long the next socket request takes to be answered."""
+
+        self._socket_requests += 1
+        delay = self.latency
+        if self.stall_every and self._socket_requests % self.stall_every == 0:
+            self.stalls += 1
+            delay += self.stall
+        return int(delay * NS_PER_S)
+
+
+class Display:
+    def __init__(self, width: int, height: int) -> None:
+        self.width = width
+        self.height = height
+        self.root_group = None
+        self.brightness = 1.0
+        self.auto_refresh = True
+        self.refreshes = 0
+
+    def refresh(self, **kwargs) -> bool:
+        self.refreshes += 1
+        return True
+
+    def frame(self):
+        """What the panel is showing, as a (height, width, 3) uint8 array."""
+
+        return rasterise(self.root_group, self.width, self.height)
+
+
+class Matrix:
+    def __init__(self, bit_depth: int = 6, width: int = 32, height: int = 32) -> None:
+        self.display = Display(width, height)
+
+
+def _module(name: str, **attrs) -> types.ModuleType:
+    module = types.ModuleType(name)
+    module.__dict__.update(attrs)
+    sys.modules[name] = module
+    return module
+
+
+class Reload(Exception):
+    """Raised by the stand-in supervisor.reload(), where the board would soft reset."""
+
+
+class GC:
+    """Stands in for `gc`: counts collections, and reports the host heap as traced.
+
+    Free memory is what's left of `heap_size`. Python objects are several times the
+    size of CircuitPython's, so the default is a lot bigger than the board's."""
+
+    def __init__(self, heap_size: int = 16 * 1024 * 1024, real: bool = False) -> None:
+        self.collections = 0
+        self.heap_size = heap_size
+        self.real = real
+
+    def collect(self) -> None:
+        self.collections += 1
+        if self.real:  # Pay for a full host collection, for timing.
+            gc.collect()
+
+    def mem_alloc(self) -> int:
+        return tracemalloc.get_traced_memory()[0]
+
+    def mem_free(self) -> int:
+        return max(0, self.heap_size - self.mem_alloc())
+
+
+def install(clock, network: Network = None, ntp: bool = False) -> Network:
+    """Put the stand-ins in sys.modules. `clock` is a host.clock.VirtualClock.
+
+    Returns the Network that will answer HTTP requests. With `ntp`, there's an NTP
+    server answering with the clock's true time, otherwise NTP fails."""
+
+    network = network or Network()
+
+    class Any:
+        """Accepts any constructor arguments, for parts we only construct."""
+
+        def __init__(self, *args, **kwargs) -> None:
+            pass
+
+    class NeoPixel(Any):
+        def fill(self, color) -> None:
+            pass
+
+    _module(
+        "board",
+        ESP_CS="ESP_CS",
+        ESP_BUSY="ESP_BUSY",
+        ESP_RESET="ESP_RESET",
+        SCK="SCK",
+        MOSI="MOSI",
+        MISO="MISO",
+        NEOPIXEL="NEOPIXEL",
+    )
+    _module("busio", SPI=Any)
+    _module("digitalio", DigitalInOut=Any)
+    _module("neopixel", NeoPixel=NeoPixel)
+    _module("_secrets", secrets={"ssid": "host", "password": ""})
+    _module("microcontroller", nvm=bytearray(8192))
+
+    def reload() -> None:
+        raise Reload()
+
+    _module(
+        "supervisor",
+        runtime=types.SimpleNamespace(serial_bytes_available=False),
+        reload=reload,
+    )
+
+    class RTC:
+        @property
+        def datetime(self):
+            return clock.localtime()
+
+        @datetime.setter
+        def datetime(self, value) -> None:
+            clock.set(calendar.timegm(value))
+
+    _module("rtc", RTC=RTC)
+
+    class ESP_SPIcontrol(Any):
+        TCP_MODE = 0
+        UDP_MODE = 1
+
+        def __init__(self, *args, **kwargs) -> None:
+            self._joined_at = None
+
+        def wifi_set_passphrase(self, ssid: str, passphrase: str) -> None:
+            network.joins += 1
+            if network.joins <= network.join_failures:
+                self._joined_at = None
+            else:
+                delay = int(network.join_delay * NS_PER_S)
+                self._joined_at = clock.monotonic_ns_ + delay
+
+        def reset(self) -> None:
+            self._joined_at = None
+
+        def wifi_set_network(self, ssid: str) -> None:
+            self.wifi_set_passphrase(ssid, None)
+
+        @property
+        def is_connected(self) -> bool:
+            return (
+                self._joined_at is not None and clock.monotonic_ns_ >= self._joined_at
+            )
+
+    class Socket:
+        """A socket to the stand-in servers: NTP over UDP, if there is one, and
+        HTTP over TCP. Replies only become available() after the network's delay."""
+
+        def __init__(self, family=None, type=0, *args, **kwargs) -> None:
+            self.udp = type == 1
+            self.address = None
+            self.reply = b""
+            self.ready_ns = 0
+
+        def settimeout(self, value) -> None:
+            pass
+
+        def connect(self, address, conntype=None) -> None:
+            host = network.host(address[0])
+            if self.udp and not ntp:
+                raise ConnectionError("No NTP stand-in", host)
+            if not self.udp:  # esp32spi waits for the handshake.
+                clock.sleep_ns(int(network.latency * NS_PER_S))
+            self.address = (host, address[1])
+
+        def send(self, data) -> None:
+            delay = network.delay_ns()
+            self.ready_ns = clock.monotonic_ns_ + delay
+            # The server answers just as the reply starts back.
+            served_ns = clock.true_ns + delay - int(network.latency * NS_PER_S) // 2
+            if self.udp:
+                network.ntp_requests += 1
+                offset = network.ntp_offsets.get(self.address[0], 0)
+                served_ns += int(offset * NS_PER_S)
+                self.reply = self.ntp_reply(bytes(data), served_ns)
+            else:
+                path = bytes(data).split(b" ", 2)[1].decode()
+                url = "http://{}{}".format(self.address[0], path)
+                network.requests.append(url)
+                self.reply = self.http_reply(url, served_ns // NS_PER_S)
+
+        def ntp_reply(self, request: bytes, served_ns: int) -> bytes:
+            seconds, ns = divmod(served_ns, NS_PER_S)
+            stamp = struct.pack("!II", seconds + 2_208_988_800, (ns << 32) // NS_PER_S)
+            reply = bytearray(48)
+            reply[0] = 0b00_011_100  # Version 3, server
+            reply[1] = 1  # Stratum
+            reply[24:32] = request[40:48]
+            reply[32:40] = stamp
+            reply[40:48] = stamp
+            return bytes(reply)
+
+        def http_reply(self, url: str, when: int) -> bytes:
+            try:
+                body = network.reply(url, None if network.clock is None else when)
+                status = "200 OK"
+            except OSError:
+                body = b"Not found"
+                status = "404 Not Found"
+            head = (
+                "HTTP/1.1 {}\r\nDate: {}\r\nContent-Type: application/json\r\n"
+                "Content-Length: {}\r\nConnection: close\r\n\r\n"
+            ).format(status, email.utils.formatdate(when, usegmt=True), len(body))
+            return head.encode() + body
+
+        def available(self) -> int:
+            return len(self.reply) if clock.monotonic_ns_ >= self.ready_ns else 0
+
+        def connected(self) -> bool:
+            return bool(self.reply)
+
+        def _take(self, size: int) -> bytes:
+            size = min(size, self.available())
+            data, self.reply = self.reply[:size], self.reply[size:]
+            return data
+
+        def recv(self, bufsize: int = 0) -> bytes:
+            """Like esp32spi's, padded with zeros out to `bufsize`."""
+
+            data = self._take(bufsize or len(self.reply))
+            return data + bytes(max(0, bufsize - len(data)))
+
+        def recv_into(self, buffer, nbytes: int = 0) -> int:
+            data = self._take(nbytes or len(buffer))
+            buffer[: len(data)] = data
+            return len(data)
+
+        def close(self) -> None:
+            pass
+
+    esp = _module("adafruit_esp32spi.adafruit_esp32spi", ESP_SPIcontrol=ESP_SPIcontrol)
+
+    def getaddrinfo(host: str, port: int, *args) -> list:
+        """Blocks for the network's DNS delay, as get_host_by_name does."""
+
+        network.lookups += 1
+        clock.sleep_ns(int(network.dns_delay * NS_PER_S))
+        return [(2, 1, 0, "", (network.address(host), port))]
+
+    esp_socket = _module(
+        "adafruit_esp32spi.adafruit_esp32spi_socket",
+        set_interface=lambda iface: None,
+        getaddrinfo=getaddrinfo,
+        socket=Socket,
+        SOCK_STREAM=0,
+        SOCK_DGRAM=1,
+    )
+    package = _module(
+        "adafruit_esp32spi",
+        __path__=[],
+        adafruit_esp32spi=esp,
+        adafruit_esp32spi_socket=esp_socket,
+    )
+
+    matrixportal = _module("adafruit_matrixportal", __path__=[])
+    matrixportal.matrix = _module("adafruit_matrixportal.matrix", Matrix=Matrix)
+    return network
+
+
+def use_clock(clock, *modules) -> None:
+    """Point the `time` of each module at `clock`."""
+
+    for module in modules:
+        module.time = clock
+
+
+def use_gc(fake: GC, *modules) -> None:
+    """Point the `gc` of each module at `fake`, as the host's gc has no mem_alloc()."""
+
+    for module in modules:
+        module.gc = fake
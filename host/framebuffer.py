@@ -0,0 +1,71 @@
+"""
+Rasterise a displayio group to a NumPy RGB array, as the matrix would show it.
+"""
+
+import displayio
+import numpy
+
+
+def rasterise(group, width: int = 32, height: int = 32) -> numpy.ndarray:
+    """A (height, width, 3) uint8 array of what `group` draws, on black."""
+
+    frame = numpy.zeros((height, width, 3), dtype=numpy.uint8)
+    _draw(group, frame, 0, 0)
+    return frame
+
+
+def _draw(node, frame, x: int, y: int) -> None:
+    if getattr(node, "hidden", False):
+        return
+    if isinstance(node, displayio.TileGrid):
+        _draw_tilegrid(node, frame, x + node.x, y + node.y)
+        return
+    if node.scale != 1:
+        raise NotImplementedError("Scaled groups aren't supported")
+    for child in node:
+        _draw(child, frame, x + node.x, y + node.y)
+
+
+def _draw_tilegrid(grid, frame, x: int, y: int) -> None:
+    bitmap = grid.bitmap
+    palette = grid.pixel_shader
+    if not isinstance(palette, displayio.Palette):
+        raise NotImplementedError("Only Palette pixel shaders are supported")
+
+    height, width, _ = frame.shape
+    tile_width, tile_height = grid.tile_width, grid.tile_height
+    per_row = bitmap.width // tile_width
+    for tile_y in range(grid.height):
+        for tile_x in range(grid.width):
+            tile = grid[tile_x, tile_y]
+            source_x = tile % per_row * tile_width
+            source_y = tile // per_row * tile_height
+            for py in range(tile_height):
+                fy = y + tile_y * tile_height + py
+                if not 0 <= fy < height:
+                    continue
+                for px in range(tile_width):
+                    fx = x + tile_x * tile_width + px
+                    if not 0 <= fx < width:
+                        continue
+                    value = bitmap[source_x + px, source_y + py]
+                    if palette.is_transparent(value):
+                        continue
+                    color = palette[value]
+                    frame[fy, fx] = (color >> 16, color >> 8 & 0xFF, color & 0xFF)
+
+
+def write_ppm(path: str, frame: numpy.ndarray) -> None:
+    height, width, _ = frame.shape
+    with open(path, "wb") as f:
+        f.write(b"P6\n%d %d\n255\n" % (width, height))
+        f.write(frame.tobytes())
+
+
+def read_ppm(path: str) -> numpy.ndarray:
+    with open(path, "rb") as f:
+        magic, size, depth, data = f.read().split(b"\n", 3)
+    if magic != b"P6" or depth != b"255":
+        raise ValueError("Not a P6 PPM: {}".format(path))
+    width, height = (int(n) for n in size.split())
+    return numpy.frombuffer(data, dtype=numpy.uint8).reshape((height, width, 3))
@@ -0,0 +1,278 @@
+"""
+Soak test: run ZoneClock.main on a virtual clock for days of simulated time in seconds.
+
+Everything the board talks to is a stand-in (see host.fakes), and worldtimeapi answers
+from the host's zoneinfo for the simulated time. At the end it reports HTTP and NTP
+requests, frames, collections, peak heap and how late the display was to show each
+minute flip and DST change.
+
+Run from the repo root: python -m host.sim [--days 30] [--drift-ppm 20] [--no-ntp]
+[--heap-kb 16384]
+[--real-gc] [--gc-every-loop] [--stall 5 --stall-every 3] [--falseticker 3]
+[--dns-delay 0.1]
+
+--real-gc makes each collection a real host gc.collect(), so the loop stats show what
+they cost. --gc-every-loop collects every loop, as main did before gcpolicy.
+--stall S --stall-every N makes every Nth network request take S seconds longer.
+--join-delay S --join-failures N: the access point takes S seconds to join, and
+ignores the first N tries. --falseticker S makes the first NTP server S seconds out.
+--dns-delay S makes each DNS lookup block everything for S seconds.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import sys
+import time
+import tracemalloc
+
+from host import fakes, tz
+from host.clock import NS_PER_S, SimulationOver, VirtualClock, VirtualEventLoop
+
+# 2026-03-01 00:00 UTC, so 30 days runs over the US and EU DST starts.
+DEFAULT_START = 1772323200
+
+
+class Soak:
+    """Watches each frame the app draws against the true time."""
+
+    def __init__(self, app, clock: VirtualClock) -> None:
+        self.app = app
+        self.clock = clock
+        self.frames = 0
+        self.first_frame_ns = None
+        self.wrong_frames = 0
+        self.flip_latencies = []  # ns, signed, display vs. true minute boundary
+        self.dst_latencies = []  # ns, display vs. true DST change
+        self._minute = None
+        self._offsets = None
+
+        self._time_group = app.time_group
+        app.time_group = self.time_group
+
+    def time_group(self, now: int = None):
+        group = self._time_group(now)
+        self.frames += 1
+        if self.first_frame_ns is None:
+            self.first_frame_ns = self.clock.true_ns
+
+        app = self.app
+        now_ns = self.clock.true_ns
+        now = now_ns // NS_PER_S
+        shown = (app.face._hours, app.face._minute)
+        truth = [tz.local_time(name, now) for name in app.timezone_names]
+        if shown != ([h for h, _ in truth], truth[0][1]):
+            self.wrong_frames += 1
+
+        # When the minute on show changes, how far was that from a true boundary?
+        minute = app.face._minute
+        if self._minute is not None and minute != self._minute:
+            boundary = (now_ns + 30 * NS_PER_S) // (60 * NS_PER_S) * 60 * NS_PER_S
+            self.flip_latencies.append(now_ns - boundary)
+        self._minute = minute
+
+        # Likewise for each change of a zone's offset, against the DST change.
+        offsets = list(app.zone_times.offsets)
+        if self._offsets is not None:
+            for i, name in enumerate(app.timezone_names):
+                if offsets[i] != self._offsets[i]:
+                    changes = tz.transitions(name, now - 86400, now + 86400)
+                    if changes:
+                        nearest = min(changes, key=lambda t: abs(t - now))
+                        self.dst_latencies.append(now_ns - nearest * NS_PER_S)
+        self._offsets = offsets
+        return group
+
+
+class Serial:
+    """Where the app's prints go: counted, not kept."""
+
+    def __init__(self) -> None:
+        self.chars = 0
+        self.lines = 0
+
+    def write(self, text: str) -> int:
+        self.chars += len(text)
+        self.lines += text.count("\n")
+        return len(text)
+
+    def flush(self) -> None:
+        pass
+
+
+def _stop(loop) -> None:
+    """Cancel what's left running on `loop`, and close it."""
+
+    tasks = asyncio.all_tasks(loop)
+    for task in tasks:
+        task.cancel()
+    loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+    loop.close()
+
+
+def _stats(values) -> str:
+    if not values:
+        return "none"
+    worst = max(values, key=abs)
+    mean = sum(abs(v) for v in values) / len(values)
+    return "worst {:+.3f}s, mean |{:.3f}|s, n={}".format(
+        worst / NS_PER_S, mean / NS_PER_S, len(values)
+    )
+
+
+def simulate(
+    days: float,
+    start: int,
+    drift_ppb: int,
+    ntp: bool,
+    backend: str,
+    heap_size: int = 16 * 1024 * 1024,
+    real_gc: bool = False,
+    gc_every_loop: bool = False,
+    stall: float = 0,
+    stall_every: int = 0,
+    join_delay: float = 2,
+    join_failures: int = 0,
+    falseticker: float = 0,
+    dns_delay: float = 0.1,
+):
+    clock = VirtualClock(start, drift_ppb=drift_ppb, end=start + int(days * 86400))
+    network = fakes.Network(
+        clock,
+        stall=stall,
+        stall_every=stall_every,
+        join_delay=join_delay,
+        join_failures=join_failures,
+        dns_delay=dns_delay,
+    )
+    fakes.install(clock, network, ntp=ntp)
+
+    import ahttp
+    import basic
+    import cron
+    import gcpolicy
+    import heapstats
+    import main as clock_main
+    import ringlog
+    import sntp
+    import wifi
+
+    fakes.use_clock(clock, ahttp, basic, cron, clock_main, ringlog, sntp, wifi)
+    if falseticker:
+        network.ntp_offsets[basic.NTP_SERVERS[0]] = falseticker
+    gc = fakes.GC(heap_size, real=real_gc)
+    fakes.use_gc(gc, gcpolicy, heapstats)
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    serial = Serial()
+    with contextlib.redirect_stdout(serial):
+        app = clock_main.ZoneClock(clock_main.TIMEZONES_to_SHOW, text_backend=backend)
+        soak = Soak(app, clock)
+        app.heap_command(["on"])
+        if gc_every_loop:  # As main did every loop before gcpolicy, for comparison.
+            policy = app.gc_policy
+            policy.maybe_collect = lambda: policy.collect() or True
+        reset_at = None
+        loop = VirtualEventLoop(clock)
+        try:
+            loop.run_until_complete(app.run_tasks())
+        except SimulationOver:
+            pass
+        except fakes.Reload:
+            reset_at = clock.true_ns
+        finally:
+            _stop(loop)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print("Simulated {:.1f} days in {:.1f}s".format(days, elapsed))
+    print(
+        "First frame:     {:.2f}s after boot".format(
+            (soak.first_frame_ns - start * NS_PER_S) / NS_PER_S
+        )
+    )
+    print("WiFi joins:      {}".format(network.joins))
+    print("HTTP requests:   {}".format(len(network.requests)))
+    for kind in sorted(
+        {url.split("?")[0].rsplit("/", 1)[-1] for url in network.requests}
+    ):
+        count = sum(1 for url in network.requests if url.endswith("/" + kind))
+        print("  {:24s} {}".format(kind, count))
+    print("NTP requests:    {}".format(network.ntp_requests))
+    print("DNS lookups:     {}, {}s each".format(network.lookups, dns_delay))
+    if stall_every:
+        print("Stalled:         {} requests, {}s each".format(network.stalls, stall))
+    print("Serial output:   {} lines, {} KB".format(serial.lines, serial.chars // 1024))
+    print("Frames rendered: {}".format(soak.frames))
+    print("Wrong frames:    {}".format(soak.wrong_frames))
+    print("gc.collect():    {}".format(gc.collections))
+    print("Peak host heap:  {:.0f} KB".format(peak / 1024))
+    print("Minute flips:    {}".format(_stats(soak.flip_latencies)))
+    print("DST changes:     {}".format(_stats(soak.dst_latencies)))
+    if reset_at is not None:
+        print(
+            "Soft reset after {:.2f} days".format(
+                (reset_at // NS_PER_S - start) / 86400
+            )
+        )
+    print("Loop phases (host time, wake on the virtual clock):")
+    app.loop_stats.print_report()
+    print("Heap (host objects, in a {}KB heap):".format(heap_size // 1024))
+    app.heap_command([])
+    print(
+        "RTC error:       {:+.3f}s".format((clock.wall_ns - clock.true_ns) / NS_PER_S)
+    )
+    print(
+        "Time error:      {:+.3f}s, drift corrected".format(
+            (app.time_ns() - clock.true_ns) / NS_PER_S
+        )
+    )
+    print(
+        "Drift:           {} +/- {} ppb estimated, {} ppb true".format(
+            app.drift.rate_ppb, app.drift.uncertainty_ppb, drift_ppb
+        )
+    )
+    return soak, network
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--days", type=float, default=30)
+    parser.add_argument("--start", type=int, default=DEFAULT_START)
+    parser.add_argument("--drift-ppm", type=float, default=20)
+    parser.add_argument("--no-ntp", action="store_true")
+    parser.add_argument("--backend", default="label")
+    parser.add_argument("--heap-kb", type=int, default=16 * 1024)
+    parser.add_argument("--real-gc", action="store_true")
+    parser.add_argument("--gc-every-loop", action="store_true")
+    parser.add_argument("--stall", type=float, default=0)
+    parser.add_argument("--stall-every", type=int, default=0)
+    parser.add_argument("--join-delay", type=float, default=2)
+    parser.add_argument("--join-failures", type=int, default=0)
+    parser.add_argument("--falseticker", type=float, default=0)
+    parser.add_argument("--dns-delay", type=float, default=0.1)
+    args = parser.parse_args(argv)
+
+    simulate(
+        args.days,
+        args.start,
+        int(args.drift_ppm * 1000),
+        not args.no_ntp,
+        args.backend,
+        args.heap_kb * 1024,
+        args.real_gc,
+        args.gc_every_loop,
+        args.stall,
+        args.stall_every,
+        args.join_delay,
+        args.join_failures,
+        args.falseticker,
+        args.dns_delay,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+"""
+The host's zoneinfo as a source of truth, and worldtimeapi replies made from it.
+"""
+
+import datetime
+import json
+import os
+from zoneinfo import ZoneInfo
+
+FIXTURES = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "bench", "fixtures"
+)
+HOUR = 60 * 60
+
+
+def utc_offset(name: str, when: int) -> int:
+    """Seconds east of UTC in zone `name` at epoch `when`."""
+
+    moment = datetime.datetime.fromtimestamp(when, datetime.timezone.utc)
+    return int(moment.astimezone(ZoneInfo(name)).utcoffset().total_seconds())
+
+
+def local_time(name: str, when: int) -> tuple:
+    """(hour, minute) in zone `name` at epoch `when`."""
+
+    local = when + utc_offset(name, when)
+    return local // HOUR % 24, local // 60 % 60
+
+
+def transitions(name: str, start: int, end: int) -> list:
+    """Epoch seconds of every offset change in zone `name` in [start, end)."""
+
+    found = []
+    when = start
+    offset = utc_offset(name, when)
+    while when < end:
+        step = min(HOUR, end - when)
+        if utc_offset(name, when + step) != offset:
+            low, high = when, when + step  # The change is in (low, high].
+            while high - low > 1:
+                middle = (low + high) // 2
+                if utc_offset(name, middle) == offset:
+                    low = middle
+                else:
+                    high = middle
+            found.append(high)
+            offset = utc_offset(name, high)
+        when += step
+    return found
+
+
+def _iso(when: int, offset: int) -> str:
+    zone = datetime.timezone(datetime.timedelta(seconds=offset))
+    return datetime.datetime.fromtimestamp(when, zone).isoformat()
+
+
+def worldtimeapi_reply(name: str, when: int) -> bytes:
+    """What worldtimeapi.org would answer for zone `name` at epoch `when`.
+
+    Same fields, in the same order, as the recorded replies in bench/fixtures."""
+
+    zone = ZoneInfo(name)
+    moment = datetime.datetime.fromtimestamp(when, datetime.timezone.utc).astimezone(
+        zone
+    )
+    offset = int(moment.utcoffset().total_seconds())
+    dst_offset = int(moment.dst().total_seconds())
+
+    dst_from = dst_until = None
+    if dst_offset:
+        changes = transitions(name, when - 366 * 24 * HOUR, when + 366 * 24 * HOUR)
+        dst_from = _iso(max(t for t in changes if t <= when), 0)
+        dst_until = _iso(min(t for t in changes if t > when), 0)
+
+    with open(os.path.join(FIXTURES, "worldtimeapi_utc.json")) as f:
+        reply = json.load(f)
+    reply.update(
+        abbreviation=moment.tzname(),
+        datetime=moment.isoformat(),
+        day_of_week=moment.isoweekday() % 7,
+        day_of_year=moment.timetuple().tm_yday,
+        dst=bool(dst_offset),
+        dst_from=dst_from,
+        dst_offset=dst_offset,
+        dst_until=dst_until,
+        raw_offset=offset - dst_offset,
+        timezone=name,
+        unixtime=when,
+        utc_datetime=_iso(when, 0),
+        utc_offset=moment.strftime("%z")[:3] + ":" + moment.strftime("%z")[3:],
+        week_number=moment.isocalendar()[1],
+    )
+    return json.dumps(reply, separators=(",", ":")).encode()
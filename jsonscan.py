@@ -0,0 +1,171 @@
+"""
+Pull a few keys out of a flat JSON object as it streams in, without building the whole
+thing.
+
+Only the values of the keys asked for are ever buffered; everything else is skipped a
+byte at a time as the chunks go by. Nested objects and arrays are skipped, not parsed.
+"""
+
+_QUOTE = 0x22  # "
+_BACKSLASH = 0x5C
+_COLON = 0x3A
+_OPEN = b"{["
+_CLOSE = b"}]"
+_VALUE_END = b",}] \t\r\n"
+
+# Scanner states
+_KEY = 0  # Waiting for a key to start
+_IN_KEY = 1
+_COLON_NEXT = 2
+_VALUE = 3  # Waiting for a value to start
+_IN_STRING = 4
+_IN_SCALAR = 5  # A number, true, false or null
+_IN_NESTED = 6
+
+
+def _scalar(raw: bytes):
+    if raw == b"true":
+        return True
+    if raw == b"false":
+        return False
+    if raw == b"null":
+        return None
+    if b"." in raw or b"e" in raw or b"E" in raw:
+        return float(raw)
+    return int(raw)
+
+
+class Scanner:
+    """Scans the top level object fed to it, a chunk at a time, for `keys`.
+
+    `found` is a dict of the keys found so far. String values with escapes are kept
+    as-is apart from the quotes, which is fine for the plain ASCII we care about.
+    """
+
+    def __init__(self, keys) -> None:
+        self.wanted = {}
+        for key in keys:
+            self.wanted[key.encode()] = key
+        self.found = {}
+        self.done = False
+
+        self.state = _KEY
+        self.depth = 0  # Of the object we're in, the top level one is 1.
+        self.nested = 0
+        self.escaped = False
+        self.key = bytearray()
+        self.value = None  # A bytearray while keeping a wanted value, else None.
+        self.keep = None  # The str key the current value is for, if wanted.
+
+    def feed(self, chunk) -> bool:
+        """Scan the next chunk of bytes. True once the object's closed, when the
+        rest of the input can be skipped."""
+
+        # Locals for the loop, it's the hot path on the board.
+        found = self.found
+        state = self.state
+        depth = self.depth
+        nested = self.nested
+        escaped = self.escaped
+        key = self.key
+        value = self.value
+        keep = self.keep
+
+        for byte in chunk:
+            if state == _IN_STRING:
+                if escaped:
+                    escaped = False
+                elif byte == _BACKSLASH:
+                    escaped = True
+                elif byte == _QUOTE:
+                    if keep is not None:
+                        found[keep] = value.decode()
+                    state = _KEY
+                    continue
+                if keep is not None:
+                    value.append(byte)
+            elif state == _IN_SCALAR:
+                if byte in _VALUE_END:
+                    if keep is not None:
+                        found[keep] = _scalar(bytes(value))
+                    state = _KEY
+                    if byte in _CLOSE:
+                        depth -= 1
+                        if depth == 0:
+                            self.done = True
+                            break
+                elif keep is not None:
+                    value.append(byte)
+            elif state == _IN_KEY:
+                if escaped:
+                    escaped = False
+                elif byte == _BACKSLASH:
+                    escaped = True
+                elif byte == _QUOTE:
+                    state = _COLON_NEXT
+                    continue
+                key.append(byte)
+            elif state == _KEY:
+                if byte == _QUOTE and depth == 1:
+                    key[:] = b""
+                    state = _IN_KEY
+                elif byte in _OPEN:
+                    depth += 1
+                elif byte in _CLOSE:
+                    depth -= 1
+                    if depth == 0:
+                        self.done = True
+                        break
+            elif state == _COLON_NEXT:
+                if byte == _COLON:
+                    keep = self.wanted.get(bytes(key))
+                    value = bytearray() if keep is not None else None
+                    state = _VALUE
+            elif state == _VALUE:
+                if byte == _QUOTE:
+                    state = _IN_STRING
+                elif byte in _OPEN:
+                    nested = 1
+                    state = _IN_NESTED
+                elif byte not in _VALUE_END:
+                    if keep is not None:
+                        value.append(byte)
+                    state = _IN_SCALAR
+            elif state == _IN_NESTED:
+                # Strings holding brackets would confuse this, but nothing we read
+                # has nested values at all.
+                if byte in _OPEN:
+                    nested += 1
+                elif byte in _CLOSE:
+                    nested -= 1
+                    if nested == 0:
+                        state = _KEY
+
+        self.state = state
+        self.depth = depth
+        self.nested = nested
+        self.escaped = escaped
+        self.value = value
+        self.keep = keep
+        return self.done
+
+
+def extract(chunks, keys) -> dict:
+    """Scan the top level object in `chunks` (an iterable of bytes) for `keys`.
+    Returns a dict of the keys found."""
+
+    scanner = Scanner(keys)
+    for chunk in chunks:
+        if scanner.feed(chunk):
+            break
+    return scanner.found
+
+
+async def extract_async(chunks, keys) -> dict:
+    """extract() for an async iterable of bytes, such as an ahttp.Response."""
+
+    scanner = Scanner(keys)
+    async for chunk in chunks:
+        if scanner.feed(chunk):
+            break
+    return scanner.found
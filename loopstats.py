@@ -0,0 +1,91 @@
+"""
+Where the main loop's time goes: a fixed size histogram of durations for each phase.
+
+Buckets are powers of two of microseconds, so recording is a few shifts and an add,
+and nothing is allocated once a phase has been seen.
+"""
+
+import time
+
+# Bucket 0 is under 1us, bucket i is [2**(i-1), 2**i) us, the last one is the rest.
+BUCKETS = 22  # The last starts at ~1s.
+
+
+class Histogram:
+    """Counts of durations in power of two microsecond buckets, with total and max."""
+
+    def __init__(self) -> None:
+        self.counts = [0] * BUCKETS
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+    def add(self, ns: int) -> None:
+        us = ns // 1000 if ns > 0 else 0
+        i = 0
+        while us and i < BUCKETS - 1:
+            us >>= 1
+            i += 1
+        self.counts[i] += 1
+        self.count += 1
+        self.total_ns += ns
+        if ns > self.max_ns:
+            self.max_ns = ns
+
+    def report(self) -> str:
+        if not self.count:
+            return "-"
+        buckets = " ".join(
+            "<{}us:{}".format(1 << i, n) for i, n in enumerate(self.counts[:-1]) if n
+        )
+        if self.counts[-1]:
+            buckets += " more:{}".format(self.counts[-1])
+        return "n={} mean={}us max={}us {}".format(
+            self.count,
+            self.total_ns // self.count // 1000,
+            self.max_ns // 1000,
+            buckets,
+        )
+
+
+class LoopStats:
+    """A Histogram per phase of the loop, by name, in the order first seen.
+
+    Time phases with `lap`:
+
+        t = stats.start()
+        ...
+        t = stats.lap("gc", t)
+    """
+
+    def __init__(self) -> None:
+        self.phases = {}
+        self.names = []
+        # A heapstats.HeapStats to take a heap sample at each lap too, if set.
+        self.heap = None
+
+    def start(self) -> int:
+        if self.heap is not None:
+            self.heap.start()
+        return time.monotonic_ns()
+
+    def add(self, name: str, ns: int) -> None:
+        histogram = self.phases.get(name)
+        if histogram is None:
+            histogram = self.phases[name] = Histogram()
+            self.names.append(name)
+        histogram.add(ns)
+
+    def lap(self, name: str, since: int) -> int:
+        """Record the time from `since` to now for `name`, and return now."""
+
+        now = time.monotonic_ns()
+        self.add(name, now - since)
+        if self.heap is not None:
+            self.heap.lap(name)
+            now = time.monotonic_ns()  # Don't count the sample in the next phase.
+        return now
+
+    def print_report(self) -> None:
+        for name in self.names:
+            print("{:8s} {}".format(name, self.phases[name].report()))
@@ -6,17 +6,36 @@
 Ash's multi-TZ wall clock
 """
 
-import gc
 import time
 import displayio
 import terminalio
-from adafruit_datetime import datetime
 from adafruit_display_text.label import Label
 from adafruit_matrixportal.matrix import Matrix
-from adafruit_datetime import timezone
 
 import colors2 as colors
 import basic
+from ringlog import log
+from clockface import ClockFace
+from posixtz import PosixTZ
+from zonetime import ZoneTimes
+
+# How the clock face draws text, one of clockface.TEXT_BACKENDS.
+# See bench/bench_backends.py for what each one costs.
+TEXT_BACKEND = "label"
+
+# Time each phase of the main loop from boot. They can also be switched on and off,
+# and shown, with the "stats" command on the serial console.
+LOOP_STATS = False
+
+# Set the RTC at boot from the WiFi test's HTTP Date header, to the second, rather than
+# wait for a proper sync. Later Date headers sanity check it.
+HTTP_DATE_SYNC = True
+
+# Time reads are corrected for the RTC's drift, and the RTC is synced again before
+# they could be more than this far out. See drift.py.
+TIME_ERROR_BOUND = 0.05  # Seconds
+# How often to sync the RTC at most, while it's not working out.
+SYNC_INTERVAL = 2 * 60 * 60  # Seconds
 
 TIMEZONES_to_SHOW = [
     "America/Los_Angeles",
@@ -32,6 +51,15 @@ COUNTRY_CODES = {
     "Asia/Kuala_Lumpur": "MY",
 }
 
+# POSIX TZ rules, so offsets and DST changes are worked out on the board.
+# Zones without a rule here are looked up from worldtimeapi instead.
+TZ_RULES = {
+    "America/Los_Angeles": "PST8PDT,M3.2.0,M11.1.0",
+    "Europe/Berlin": "CET-1CEST,M3.5.0,M10.5.0/3",
+    "Europe/Athens": "EET-2EEST,M3.5.0/3,M10.5.0/4",
+    "Asia/Kuala_Lumpur": "<+08>-8",
+}
+
 FLAG_COLORS = {
     "US": [colors.RED, colors.WHITE, colors.BLUE],
     "DE": [colors.GRAY, colors.RED, colors.GOLD],
@@ -43,8 +71,10 @@ FLAG_COLORS = {
 class ZoneClock(basic.BasicApp):
     """A clock for showing 4 time zones on a 32x32 display."""
 
-    def __init__(self, timezone_names: list[str]) -> None:
+    def __init__(self, timezone_names: list[str], text_backend: str = "label") -> None:
         super().__init__()
+        self.http_date_sync = HTTP_DATE_SYNC
+        self.time_error_bound_ns = int(TIME_ERROR_BOUND * 1_000_000_000)
 
         # Board level variables
         self.matrix = Matrix(bit_depth=6, width=32, height=32)
@@ -58,11 +88,21 @@ class ZoneClock(basic.BasicApp):
 
         # The zones we will be monitoring.
         self.timezone_names = timezone_names
+        self.zone_times = ZoneTimes(len(timezone_names))
+        self.zone_rules = [
+            PosixTZ(TZ_RULES[n]) if n in TZ_RULES else None for n in timezone_names
+        ]
+        # When the next DST change in any of the zones happens, if we know.
+        self.next_transition = None
 
         # The display group to use for the life of the app
         self.display_group: displayio.Group = displayio.Group(x=2, y=0)
         self.display.root_group = self.display_group
 
+        # The clock face, built once the time zones are known.
+        self.face: ClockFace = None
+        self.text_backend = text_backend
+
         # The status label we will update while starting up.
         self.status_label = Label(
             self.font,
@@ -74,115 +114,179 @@ class ZoneClock(basic.BasicApp):
         )
         self.display_group.append(self.status_label)
 
+        self.cron.add("set_rtc", SYNC_INTERVAL, jitter=60)
+        # Daily, for zones without a TZ rule that aren't in DST. Otherwise we know
+        # when the next change is and set_timezones is run right then.
+        self.cron.add("set_timezones", 60 * 60 * 24, jitter=10 * 60)
+
+        # Show the time right away if we were running not long ago.
+        self.warm_start()
+
         # WiFi setup
         self.status_label.color = self.color(colors.PURPLE)
         self.network_setup()
 
-        self.cron_jobs = {
-            "set_rtc": 60 * 60,  # Yes, the RTC sucks that bad.
-            "set_timezones": 60 * 60 * 24,  # Daily, check for offset change
-        }
+    def warm_start(self) -> bool:
+        """Pick up the zone offsets from the NVM snapshot, and show the clock."""
 
-    def set_timezones(self) -> list[timezone]:
-        """Lookup all the current TZ offsets.
+        snapshot = self.load_warm_start(len(self.timezone_names))
+        if snapshot is None:
+            return False
 
-        Needs to be called to update when time zones change. (daily)"""
+        self.next_transition, offsets = snapshot
+        self.zone_times.offsets[:] = offsets
+        # No rush for the network, the snapshot's good for now. The RTC as it is
+        # does for now, the drift correction needs its phase, which render_task
+        # learns once this first frame is up.
+        now = time.time()
+        interval = self.drift.next_interval(self.time_error_bound_ns)
+        self.cron.reschedule("set_rtc", max(0, self.last_sync + interval - now))
+        self.cron.reschedule("set_timezones", 60 * 60 * 24)
+        self.time_group(now)
+        return True
+
+    async def set_timezones(self):
+        """Work out all the current TZ offsets.
+
+        Zones with a TZ rule are done locally from the RTC, the rest are looked up.
+        Needs to be called to update when time zones change. (daily, and at the
+        next DST change we know of)"""
 
         self.set_boot_status("Time Zones")
-        self.timezones = [
-            self.lookup_timezone(name=n, set_rtc=False) for n in self.timezone_names
-        ]
+        now = self.time()
+        for i, name in enumerate(self.timezone_names):
+            if self.zone_rules[i] is None:
+                # While in DST we already know the offset holds until dst_until.
+                dst_until = self.dst_transitions.get(name, (None, None))[1]
+                if dst_until is None or dst_until <= now:
+                    self.zone_times.offsets[i] = await self.lookup_timezone(name=name)
+        self.update_offsets()
+
+    def update_offsets(self):
+        """Work out the offsets of the zones with a TZ rule, and when the next DST
+        change in any zone is. No network, so the render task can do it right at the
+        change."""
+
+        now = self.time()
+        self.next_transition = None
+        for i, name in enumerate(self.timezone_names):
+            rule = self.zone_rules[i]
+            if rule is None:
+                transitions = self.dst_transitions.get(name, ())
+            else:
+                self.zone_times.offsets[i] = rule.offset(now)
+                log.info("{0:20s} {1:d}", name, self.zone_times.offsets[i])
+                transitions = (rule.next_transition(now),)
+
+            for transition in transitions:
+                if transition is not None and transition > now:
+                    if (
+                        self.next_transition is None
+                        or transition < self.next_transition
+                    ):
+                        self.next_transition = transition
 
-    def set_rtc(self):
-        """Set the RTC to UTC."""
+        self.save_warm_start(self.next_transition, self.zone_times.offsets)
+
+    async def set_rtc(self):
+        """Set the RTC to UTC. Returns seconds until the next sync."""
 
         self.set_boot_status("Time Sync")
-        self.lookup_timezone(name="UTC", set_rtc=True)
-
-    def time_group(self) -> displayio.Group:
-        """Generate the main display group for the clock with all the pretty colors."""
-
-        group = displayio.Group(x=0, y=4)
-        font_width, font_height = self.font.get_bounding_box()
-        font_width -= 1
-        line_height = 8
-        now = datetime.now()
-
-        for i, tz in enumerate(self.timezones):
-            y = i * line_height
-            tz_name = tz._name  # There's no property for this.
-            country_code = COUNTRY_CODES[tz_name]
-            flag_colors = FLAG_COLORS[country_code]
-            print("Flag colors: {0} = {1}".format(tz_name, repr(flag_colors)))
-
-            # First we print the hours
-            group.append(
-                Label(
-                    self.font,
-                    text="{:2d}".format((now + tz.utcoffset(None)).hour),
-                    color=self.color(flag_colors[0]),
-                    x=0,
-                    y=y,
-                )
+        interval = await super().set_rtc()
+        if self.face is not None:  # Only once the zones are known.
+            self.save_warm_start(self.next_transition, self.zone_times.offsets)
+        return interval
+
+    def soft_reset(self, reason: str):
+        """Save the warm start snapshot first, so the time's back up right away."""
+
+        self.save_warm_start(self.next_transition, self.zone_times.offsets)
+        super().soft_reset(reason)
+
+    def set_brightness(self, brightness: float):
+        """Change the brightness of the clock face: palette writes and a refresh, no
+        relayout."""
+
+        self.brightness = brightness
+        if self.face is not None:
+            self.face.recolor()
+
+    def time_group(self, now: int = None) -> displayio.Group:
+        """Update the main display group for the clock with all the pretty colors,
+        for `now` (Unix seconds), or self.time().
+
+        The group is only built the first time, after that just the changed labels are
+        updated so we don't churn the heap or force a full redraw every tick."""
+
+        if self.face is None:
+            rows = []
+            for tz_name in self.timezone_names:
+                country_code = COUNTRY_CODES[tz_name]
+                flag_colors = FLAG_COLORS[country_code]
+                log.debug("Flag colors: {0} = {1!r}", tz_name, flag_colors)
+                rows.append((country_code, flag_colors))
+            self.colors.prime(c for _, flag_colors in rows for c in flag_colors)
+            # Palette writes refresh right away, as render_task turns auto refresh off.
+            self.face = ClockFace(
+                self.font, rows, self.color, self.text_backend, self.display.refresh
             )
+            self.display.root_group = self.face.group
 
-            # What comes next depends on the row:
-            if i == 0:
-                # First row has the actual minutes of the hour
-                group.append(
-                    Label(
-                        self.font,
-                        text=":",
-                        color=self.color(flag_colors[1]),
-                        x=font_width * 2,
-                        y=y - 1,
-                    )
-                )
-                group.append(
-                    Label(
-                        self.font,
-                        text="{:02d}".format(now.minute),
-                        color=self.color(flag_colors[2]),
-                        x=font_width * 2 + 4,
-                        y=y,
-                    )
-                )
-            else:
-                # Every other row, instead of the minutes, the country code is shown.
-                group.append(
-                    Label(
-                        self.font,
-                        text=country_code[0],
-                        color=self.color(flag_colors[1]),
-                        x=font_width * 2 + 4,
-                        y=y,
-                    )
-                )
-                group.append(
-                    Label(
-                        self.font,
-                        text=country_code[1],
-                        color=self.color(flag_colors[2]),
-                        x=font_width * 3 + 5,
-                        y=y,
-                    )
-                )
-        return group
-
-    def main(self) -> None:
-        self.cron_run()
-        self.status_label = None  # No longer available.
+        self.zone_times.update(self.time() if now is None else now)
+        self.face.update(self.zone_times.hours, self.zone_times.minutes[0])
+        return self.face.group
 
-        while True:
-            print("Time: ", datetime.now())
-            gc.collect()
-            self.cron_run()
-            self.display.root_group = self.time_group()
+    async def render_task(self):
+        """Draw the clock, and sleep until something on screen changes: the minute,
+        or a DST change.
 
-            time.sleep(10)
+        Until the time's known, from a warm start or the first sync, the boot status
+        stays up instead."""
 
+        await self.time_known.wait()
+        self.status_label = None  # No longer shown.
+        # The ruled zones don't need to wait for set_timezones.
+        self.update_offsets()
+        # Refresh once a frame is drawn, rather than whenever the display feels like.
+        self.display.auto_refresh = False
 
-app = ZoneClock(TIMEZONES_to_SHOW)
-
+        while True:
+            # Phase timings, only when they're switched on. See BasicApp.stats_command.
+            stats = self.loop_stats
+            if stats is not None:
+                start = t = stats.start()
+            if self.next_transition is not None and self.time() >= self.next_transition:
+                self.update_offsets()
+                if None in self.zone_rules:  # Those need looking up again.
+                    self.sync_soon("set_timezones")
+                if stats is not None:
+                    t = stats.lap("zones", t)
+            self.time_group()
+            if stats is not None:
+                t = stats.lap("render", t)
+            self.display.refresh()
+            if stats is not None:
+                stats.add("frame", stats.lap("refresh", t) - start)
+            if self._second_edge is None:
+                # Only once the first frame's up, as it takes up to a second.
+                await self.find_second_edge()
+
+            now = self.time()
+            log.debug("Time: {0}", now)
+            wake = now - now % 60 + 60
+            if self.next_transition is not None:
+                wake = min(wake, self.next_transition)
+            deadline = self.monotonic_at(wake)
+            await self.sleep_until(deadline)
+            if stats is not None:
+                # How late we woke, on the app's clock rather than the stats' own.
+                stats.add("wake", time.monotonic_ns() - deadline)
+
+
+# The board runs main.py as __main__, so this only stops the app starting when it's
+# imported on the host.
 if __name__ == "__main__":
+    app = ZoneClock(TIMEZONES_to_SHOW, text_backend=TEXT_BACKEND)
+    if LOOP_STATS:
+        app.stats_command(["on"])
     app.main()
@@ -0,0 +1,197 @@
+"""
+An evaluator for POSIX TZ rule strings, e.g. "CET-1CEST,M3.5.0,M10.5.0/3".
+
+Good enough to work out a zone's UTC offset and its next DST change from the RTC alone,
+without asking a server. All the date math is on integer epoch seconds.
+"""
+
+SECONDS_PER_DAY = 24 * 60 * 60
+DAYS_BEFORE_MONTH = (0, 31, 59, 90, 120, 151, 181, 212, 243, 273, 304, 334)
+
+
+def is_leap(year: int) -> bool:
+    return year % 4 == 0 and (year % 100 != 0 or year % 400 == 0)
+
+
+def days_from_civil(year: int, month: int, day: int) -> int:
+    """Days since 1970-01-01 for a proleptic Gregorian date."""
+
+    days = (year - 1970) * 365 + (year - 1969) // 4 - (year - 1901) // 100
+    days += (year - 1601) // 400 + DAYS_BEFORE_MONTH[month - 1] + day - 1
+    if month > 2 and is_leap(year):
+        days += 1
+    return days
+
+
+def year_of(now: int) -> int:
+    """The UTC year an epoch time falls in."""
+
+    days = now // SECONDS_PER_DAY
+    year = 1970 + days // 366
+    while days_from_civil(year + 1, 1, 1) <= days:
+        year += 1
+    return year
+
+
+class PosixTZ:
+    """One POSIX TZ rule string, see `man tzset` for the format.
+
+    Offsets here are seconds east of UTC, so the "-1" of "CET-1" is +3600.
+    """
+
+    def __init__(self, rule: str) -> None:
+        self.rule = rule
+        self._pos = 0
+
+        self.std_name = self._name()
+        self.std_offset = -self._time()
+        self.dst_name = None
+        self.dst_offset = self.std_offset
+        self.start = self.end = None
+
+        if self._pos < len(rule):
+            self.dst_name = self._name()
+            self.dst_offset = self.std_offset + 3600
+            if self._pos < len(rule) and rule[self._pos] != ",":
+                self.dst_offset = -self._time()
+            if self._pos < len(rule):
+                self._expect(",")
+                self.start = self._date()
+                self._expect(",")
+                self.end = self._date()
+            else:
+                # No rule given, this is what glibc falls back to (US rules).
+                self.start = ("M", 3, 2, 0, 7200)
+                self.end = ("M", 11, 1, 0, 7200)
+
+        if self._pos != len(rule):
+            raise ValueError("Bad TZ rule: {}".format(rule))
+
+    def _expect(self, char: str) -> None:
+        if self.rule[self._pos : self._pos + 1] != char:
+            raise ValueError("Bad TZ rule: {}".format(self.rule))
+        self._pos += 1
+
+    def _name(self) -> str:
+        rule, start = self.rule, self._pos
+        if rule[start : start + 1] == "<":
+            end = rule.index(">", start)
+            self._pos = end + 1
+            return rule[start + 1 : end]
+        end = start
+        while end < len(rule) and rule[end].isalpha():
+            end += 1
+        if end - start < 3:
+            raise ValueError("Bad TZ rule: {}".format(rule))
+        self._pos = end
+        return rule[start:end]
+
+    def _number(self) -> int:
+        rule, start = self.rule, self._pos
+        end = start
+        while end < len(rule) and rule[end].isdigit():
+            end += 1
+        if end == start:
+            raise ValueError("Bad TZ rule: {}".format(rule))
+        self._pos = end
+        return int(rule[start:end])
+
+    def _time(self) -> int:
+        """[+-]hh[:mm[:ss]] in seconds."""
+
+        sign = 1
+        if self.rule[self._pos : self._pos + 1] in ("+", "-"):
+            sign = -1 if self.rule[self._pos] == "-" else 1
+            self._pos += 1
+        seconds = self._number() * 3600
+        for scale in (60, 1):
+            if self.rule[self._pos : self._pos + 1] != ":":
+                break
+            self._pos += 1
+            seconds += self._number() * scale
+        return sign * seconds
+
+    def _date(self) -> tuple:
+        """A transition date: Mm.w.d, Jn or n, with an optional /time."""
+
+        kind = self.rule[self._pos]
+        if kind == "M":
+            self._pos += 1
+            month = self._number()
+            self._expect(".")
+            week = self._number()
+            self._expect(".")
+            weekday = self._number()
+            date = ["M", month, week, weekday]
+        elif kind == "J":
+            self._pos += 1
+            date = ["J", self._number(), 0, 0]
+        else:
+            date = ["n", self._number(), 0, 0]
+
+        at = 7200  # 02:00 local, the default.
+        if self.rule[self._pos : self._pos + 1] == "/":
+            self._pos += 1
+            at = self._time()
+        date.append(at)
+        return tuple(date)
+
+    @staticmethod
+    def _local_seconds(year: int, date: tuple) -> int:
+        """Local epoch seconds of a transition date in the given year."""
+
+        kind, a, week, weekday, at = date
+        if kind == "M":
+            first = days_from_civil(year, a, 1)
+            # 1970-01-01 was a Thursday, and Sunday is 0.
+            day = first + (weekday - (first + 4)) % 7 + (week - 1) * 7
+            if week == 5:
+                next_month = (
+                    days_from_civil(year + 1, 1, 1)
+                    if a == 12
+                    else days_from_civil(year, a + 1, 1)
+                )
+                while day >= next_month:
+                    day -= 7
+        elif kind == "J":
+            # 1-365, Feb 29th is never counted.
+            day = days_from_civil(year, 1, 1) + a - 1
+            if a > 59 and is_leap(year):
+                day += 1
+        else:
+            # 0-365, Feb 29th is counted.
+            day = days_from_civil(year, 1, 1) + a
+        return day * SECONDS_PER_DAY + at
+
+    def transitions(self, year: int) -> tuple:
+        """UTC epoch seconds (dst_start, dst_end) for a year."""
+
+        start = self._local_seconds(year, self.start) - self.std_offset
+        end = self._local_seconds(year, self.end) - self.dst_offset
+        return start, end
+
+    def is_dst(self, now: int) -> bool:
+        if self.start is None:
+            return False
+        start, end = self.transitions(year_of(now))
+        if start < end:
+            return start <= now < end
+        # Southern hemisphere, DST runs over the new year.
+        return not end <= now < start
+
+    def offset(self, now: int) -> int:
+        """Seconds east of UTC at epoch time `now`, DST included."""
+
+        return self.dst_offset if self.is_dst(now) else self.std_offset
+
+    def next_transition(self, now: int):
+        """UTC epoch seconds of the next offset change after `now`, or None."""
+
+        if self.start is None:
+            return None
+        year = year_of(now)
+        for y in (year, year + 1):
+            for when in sorted(self.transitions(y)):
+                if when > now:
+                    return when
+        return None
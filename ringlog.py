@@ -0,0 +1,91 @@
+"""
+A small logger: levels, per message rate limits, and the last few records kept in RAM.
+
+Writing to the serial console is slow and every message is a new string, so records
+are kept as their format string and arguments, only formatted when printed. Anything
+below the level costs a comparison, nothing is formatted or kept.
+
+    from ringlog import log
+    log.info("RTC was off by {0}ms", error_ms)
+    log.debug("Time: {0}", now, every=600)  # At most once every 10 minutes.
+    log.warning("{0} failed", server, every=600, key=server)  # Each server apart.
+"""
+
+import time
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+LEVELS = {"debug": DEBUG, "info": INFO, "warning": WARNING, "error": ERROR}
+NAMES = {DEBUG: "D", INFO: "I", WARNING: "W", ERROR: "E"}
+
+# Records kept for "log" on the serial console.
+RING_SIZE = 64
+
+
+class Logger:
+    """Keeps records at or above `level` in a ring, and prints those at or above
+    `echo` to the console as they come."""
+
+    def __init__(self, level: int = INFO, echo: int = INFO, size: int = RING_SIZE):
+        self.level = level
+        self.echo = echo
+        # (monotonic seconds, level, message, args), oldest overwritten first.
+        self.ring = [None] * size
+        self._next = 0
+        # (message, key): monotonic seconds it may next be logged, for rate limited
+        # ones.
+        self._quiet_until = {}
+        self.suppressed = 0
+
+    def log(self, level: int, msg: str, args: tuple, every: int = 0, key=None) -> None:
+        """Log `msg` formatted with `args`. With `every`, at most once in that many
+        seconds for each message, or for each `key` if given."""
+
+        if level < self.level and level < self.echo:
+            return
+        now = time.monotonic_ns() // 1_000_000_000
+        if every:
+            key = (msg, key)
+            if now < self._quiet_until.get(key, 0):
+                self.suppressed += 1
+                return
+            self._quiet_until[key] = now + every
+        if level >= self.level:
+            self.ring[self._next] = (now, level, msg, args)
+            self._next = (self._next + 1) % len(self.ring)
+        if level >= self.echo:
+            print(self.format(level, msg, args))
+
+    def debug(self, msg: str, *args, every: int = 0, key=None) -> None:
+        if DEBUG >= self.level or DEBUG >= self.echo:
+            self.log(DEBUG, msg, args, every, key)
+
+    def info(self, msg: str, *args, every: int = 0, key=None) -> None:
+        if INFO >= self.level or INFO >= self.echo:
+            self.log(INFO, msg, args, every, key)
+
+    def warning(self, msg: str, *args, every: int = 0, key=None) -> None:
+        self.log(WARNING, msg, args, every, key)
+
+    def error(self, msg: str, *args, every: int = 0, key=None) -> None:
+        self.log(ERROR, msg, args, every, key)
+
+    def format(self, level: int, msg: str, args: tuple) -> str:
+        return NAMES[level] + " " + (msg.format(*args) if args else msg)
+
+    def dump(self) -> None:
+        """Print the records in the ring, oldest first."""
+
+        size = len(self.ring)
+        for i in range(size):
+            record = self.ring[(self._next + i) % size]
+            if record is not None:
+                when, level, msg, args = record
+                print("{0:>8d} {1}".format(when, self.format(level, msg, args)))
+        if self.suppressed:
+            print("({0} rate limited records dropped)".format(self.suppressed))
+
+
+log = Logger()
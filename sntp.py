@@ -0,0 +1,68 @@
+"""
+A minimal SNTP client: one 48 byte request, one 48 byte reply.
+
+Works with any connected UDP socket that has send() and recv_into(), which covers both
+the ESP32SPI socket on the board and a normal socket on the host.
+"""
+
+import struct
+import time
+
+NTP_PORT = 123
+NTP_PACKET_SIZE = 48
+# Seconds from the NTP epoch (1900) to the Unix epoch (1970).
+NTP_TO_UNIX = 2_208_988_800
+NS_PER_S = 1_000_000_000
+
+
+def request_packet() -> bytearray:
+    """A client request: LI 0 (no warning), version 3, mode 3 (client)."""
+
+    packet = bytearray(NTP_PACKET_SIZE)
+    packet[0] = 0b00_011_011
+    return packet
+
+
+def timestamp_ns(packet, offset: int) -> int:
+    """The NTP timestamp at `offset` in the packet, as Unix epoch nanoseconds."""
+
+    seconds, fraction = struct.unpack_from("!II", packet, offset)
+    return (seconds - NTP_TO_UNIX) * NS_PER_S + (fraction * NS_PER_S >> 32)
+
+
+def parse_reply(packet, sent_ns: int, received_ns: int) -> tuple:
+    """Work out the time from a reply, given the monotonic send and receive times.
+
+    Returns (unix_ns, round_trip_ns): the Unix time in nanoseconds at the instant
+    `received_ns` and the network round trip, server processing time not included.
+    """
+
+    if len(packet) < NTP_PACKET_SIZE:
+        raise ValueError("Short NTP reply")
+    if packet[0] & 0b111 not in (4, 5):  # Server or broadcast
+        raise ValueError("Not an NTP server reply")
+    if packet[0] >> 6 == 3:
+        raise ValueError("NTP server is unsynchronized")
+    if packet[1] == 0:
+        raise ValueError("NTP kiss-o'-death")
+
+    server_received = timestamp_ns(packet, 32)
+    server_sent = timestamp_ns(packet, 40)
+    round_trip = (received_ns - sent_ns) - (server_sent - server_received)
+    # Assume the trip back took half the round trip.
+    return server_sent + round_trip // 2, round_trip
+
+
+def query(sock) -> tuple:
+    """Ask the NTP server `sock` is connected to for the time.
+
+    Returns (unix_ns, monotonic_ns, round_trip_ns), where `unix_ns` was the time at
+    the instant time.monotonic_ns() read `monotonic_ns`."""
+
+    packet = request_packet()
+    sent = time.monotonic_ns()
+    sock.send(packet)
+    size = sock.recv_into(packet, NTP_PACKET_SIZE)
+    received = time.monotonic_ns()
+    unix_ns, round_trip = parse_reply(packet[:size], sent, received)
+    return unix_ns, received, round_trip
@@ -0,0 +1,77 @@
+"""
+Work out the time from several sources at once, and outvote any that are wrong.
+
+Each source gives a sample: the offset from time.monotonic_ns() to Unix time, give or
+take an error bound of half its round trip plus its resolution. Samples outside the
+interval most of them agree on are dropped (Marzullo's algorithm, as NTP does), the
+rest are averaged weighted by 1/error², so a quick NTP reply counts for far more than
+a slow HTTP Date that's only good to the second.
+
+    samples = [timesync.sample(unix_ns, received_ns, round_trip_ns, source="ntp")]
+    offset_ns, error_ns, used = timesync.combine(samples)
+    now_unix_ns = time.monotonic_ns() + offset_ns
+"""
+
+# The smallest error bound a sample can claim, so none get all the weight.
+MIN_ERROR_NS = 1_000_000
+
+
+def sample(
+    unix_ns: int,
+    monotonic_ns: int,
+    round_trip_ns: int,
+    resolution_ns: int = 0,
+    source: str = "",
+) -> tuple:
+    """A sample of a source that said it was `unix_ns` at time.monotonic_ns()
+    `monotonic_ns`, give or take `resolution_ns` (besides the round trip).
+
+    Returns (offset_ns, error_ns, source)."""
+
+    error = round_trip_ns // 2 + resolution_ns
+    return unix_ns - monotonic_ns, max(error, MIN_ERROR_NS), source
+
+
+def agreeing(samples: list) -> list:
+    """The indexes of the samples whose error bounds overlap the interval the most
+    of them agree on. Empty if there's no majority."""
+
+    edges = []
+    for offset, error, _ in samples:
+        edges.append((offset - error, -1))  # Starts sort before ends at a tie.
+        edges.append((offset + error, 1))
+    edges.sort()
+
+    best = count = 0
+    low = high = 0
+    for i, (edge, kind) in enumerate(edges):
+        count -= kind
+        if count > best:
+            best = count
+            low, high = edge, edges[i + 1][0]
+    if best * 2 <= len(samples):
+        return []
+    return [
+        i for i, s in enumerate(samples) if s[0] - s[1] <= high and s[0] + s[1] >= low
+    ]
+
+
+def combine(samples: list) -> tuple:
+    """(offset_ns, error_ns, used): the weighted average offset of the samples that
+    agree, its error bound, and the indexes of the samples it came from.
+
+    Raises ValueError if there are no samples, or no majority agree."""
+
+    used = agreeing(samples)
+    if not used:
+        raise ValueError("No time sources agree, from {0}".format(len(samples)))
+
+    # Averaged relative to one of them, as floats can't hold nanoseconds since 1970.
+    base = samples[used[0]][0]
+    total = weighted = 0.0
+    for i in used:
+        offset, error, _ = samples[i]
+        weight = 1 / (error * error)
+        total += weight
+        weighted += (offset - base) * weight
+    return base + int(weighted / total), int((1 / total) ** 0.5), used
@@ -0,0 +1,71 @@
+"""
+A compact, CRC checked snapshot of the clock's state, for keeping in microcontroller.nvm.
+
+With it the clock can show the time straight after a reset, instead of waiting on WiFi
+and a handful of lookups first.
+"""
+
+import struct
+
+MAGIC = b"ZClk"
+VERSION = 1
+# magic, version, zone count, last sync, next DST transition (0 for none), drift (ppb)
+HEADER = "<4sBBIIi"
+HEADER_SIZE = struct.calcsize(HEADER)
+CRC_SIZE = 2
+
+
+def crc16(data, crc: int = 0xFFFF) -> int:
+    """CRC-16/CCITT-FALSE, binascii.crc32 isn't on every board."""
+
+    for byte in data:
+        crc ^= byte << 8
+        for _ in range(8):
+            crc = (crc << 1 ^ 0x1021 if crc & 0x8000 else crc << 1) & 0xFFFF
+    return crc
+
+
+def size(count: int) -> int:
+    """Bytes needed for a snapshot of `count` zones."""
+
+    return HEADER_SIZE + 4 * count + CRC_SIZE
+
+
+def pack(last_sync: int, next_transition, drift_ppb: int, offsets: list) -> bytes:
+    count = len(offsets)
+    data = bytearray(size(count))
+    struct.pack_into(
+        HEADER,
+        data,
+        0,
+        MAGIC,
+        VERSION,
+        count,
+        last_sync,
+        next_transition or 0,
+        drift_ppb,
+    )
+    struct.pack_into("<{}i".format(count), data, HEADER_SIZE, *offsets)
+    struct.pack_into("<H", data, len(data) - CRC_SIZE, crc16(data[:-CRC_SIZE]))
+    return bytes(data)
+
+
+def unpack(data, count: int):
+    """(last_sync, next_transition, drift_ppb, offsets) from a snapshot of `count`
+    zones, or None if there isn't a valid one in `data`."""
+
+    length = size(count)
+    if len(data) < length:
+        return None
+    data = bytes(data[:length])
+    magic, version, stored_count, last_sync, next_transition, drift_ppb = (
+        struct.unpack_from(HEADER, data, 0)
+    )
+    if magic != MAGIC or version != VERSION or stored_count != count:
+        return None
+    if struct.unpack_from("<H", data, length - CRC_SIZE)[0] != crc16(
+        data[: length - CRC_SIZE]
+    ):
+        return None
+    offsets = list(struct.unpack_from("<{}i".format(count), data, HEADER_SIZE))
+    return last_sync, next_transition or None, drift_ppb, offsets
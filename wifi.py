@@ -0,0 +1,125 @@
+"""
+Bring the WiFi up a step at a time, so nothing waits on the access point.
+
+ESPSPI_WiFiManager.connect() blocks until the ESP32 has joined, retrying as it goes,
+which can be many seconds. Here joining is started, then polled, then the connection
+is tested, each step returning straight away with how long until the next is worth
+taking. Failures back off exponentially.
+"""
+
+import time
+
+import ahttp
+from ringlog import log
+
+NS_PER_S = 1_000_000_000
+
+WIFI_TEST_URL = "http://wifitest.adafruit.com/testwifi/index.html"
+
+# States, as shown on the boot status.
+DOWN = "WiFi Down"
+JOINING = "WiFi Join"
+TESTING = "WiFi Test"
+UP = "WiFi Up"
+
+JOIN_TIMEOUT = 20  # Seconds
+JOIN_POLL_INTERVAL = 0.25  # Seconds
+TEST_TIMEOUT = 10  # Seconds
+# First retry after a failure in this many seconds, doubling each time after.
+BACKOFF_BASE = 2
+BACKOFF_MAX = 5 * 60
+# Reset the ESP32 after this many failures in a row, in case it's wedged.
+RESET_AFTER = 4
+# Log failures and drop outs at most this often, as they can go on for hours.
+LOG_EVERY = 10 * 60  # Seconds
+
+# Status pixel colors.
+PIXEL_JOINING = (0, 0, 100)
+PIXEL_TESTING = (50, 50, 0)
+PIXEL_FAILED = (100, 0, 0)
+PIXEL_UP = (0, 0, 0)
+
+
+class WiFi:
+    """The ESP32's connection to the access point in `secrets`, as a state machine.
+
+    Call step() until it returns None, which means the network is up. Any other
+    return is seconds until calling again is worthwhile."""
+
+    def __init__(self, esp, secrets: dict, pixel=None) -> None:
+        self.esp = esp
+        self.secrets = secrets
+        self.pixel = pixel
+        self.state = DOWN
+        self.failures = 0
+        self._retry_at = 0
+        self._join_deadline = 0
+        # The reply to the connection test, for anyone who wants a look.
+        self.test_response = None
+
+    def _set_pixel(self, color: tuple) -> None:
+        if self.pixel is not None:
+            self.pixel.fill(color)
+
+    def _fail(self, why) -> float:
+        self.failures += 1
+        backoff = min(BACKOFF_MAX, BACKOFF_BASE << (self.failures - 1))
+        log.warning("WiFi failed ({0}), retry in {1}s", why, backoff, every=LOG_EVERY)
+        self.state = DOWN
+        self._retry_at = time.monotonic_ns() + backoff * NS_PER_S
+        self._set_pixel(PIXEL_FAILED)
+        if self.failures % RESET_AFTER == 0:
+            log.warning("Resetting the ESP32", every=LOG_EVERY)
+            self.esp.reset()
+        return backoff
+
+    async def step(self):
+        """Take the next step towards being connected. None once connected,
+        otherwise seconds until the next step."""
+
+        now = time.monotonic_ns()
+        try:
+            if self.state == UP:
+                if self.esp.is_connected:
+                    return None
+                log.warning("WiFi connection lost", every=LOG_EVERY)
+                self.state = DOWN
+                self._retry_at = now
+
+            if self.state == DOWN:
+                if now < self._retry_at:
+                    return (self._retry_at - now) / NS_PER_S
+                password = self.secrets.get("password")
+                if password:
+                    self.esp.wifi_set_passphrase(self.secrets["ssid"], password)
+                else:
+                    self.esp.wifi_set_network(self.secrets["ssid"])
+                self.state = JOINING
+                self._join_deadline = now + JOIN_TIMEOUT * NS_PER_S
+                self._set_pixel(PIXEL_JOINING)
+                return JOIN_POLL_INTERVAL
+
+            if self.state == JOINING:
+                if self.esp.is_connected:
+                    self.state = TESTING
+                    self._set_pixel(PIXEL_TESTING)
+                    return 0
+                if now >= self._join_deadline:
+                    return self._fail("timed out joining")
+                return JOIN_POLL_INTERVAL
+
+            # TESTING
+            response = await ahttp.get(WIFI_TEST_URL, timeout=TEST_TIMEOUT)
+            # Only the status and headers are wanted, not the body.
+            response.close()
+            if response.status != 200:
+                return self._fail("HTTP {0} from the test".format(response.status))
+        except (OSError, RuntimeError, ValueError) as e:
+            return self._fail(e)
+
+        self.test_response = response
+        self.state = UP
+        self.failures = 0
+        self._set_pixel(PIXEL_UP)
+        log.info("WiFi up")
+        return None
@@ -0,0 +1,35 @@
+"""
+Integer epoch time for a handful of zones.
+
+Each zone is just an offset from UTC in seconds, and the local hour/minute comes out of
+plain integer math on time.time(). No datetime/timedelta objects are made per frame.
+"""
+
+SECONDS_PER_DAY = 24 * 60 * 60
+
+
+class ZoneTimes:
+    """The local time in several zones, updated in place from an epoch time.
+
+    After `update()`, `hours[i]`, `minutes[i]` and `day_deltas[i]` hold the local time
+    of zone `i`, where the day delta is the local date minus the UTC date (-1, 0, +1).
+    """
+
+    def __init__(self, count: int) -> None:
+        self.offsets = [0] * count  # Seconds east of UTC, filled by lookup_timezone.
+        self.hours = [0] * count
+        self.minutes = [0] * count
+        self.day_deltas = [0] * count
+
+    def update(self, now: int) -> None:
+        """Recompute every zone's local time for epoch seconds `now`."""
+
+        # An epoch is too big for a small int on the board, so reduce it once here and
+        # keep everything after that in small int range.
+        seconds = now % SECONDS_PER_DAY + SECONDS_PER_DAY
+        for i in range(len(self.offsets)):
+            local = seconds + self.offsets[i]
+            self.day_deltas[i] = local // SECONDS_PER_DAY - 1
+            local %= SECONDS_PER_DAY
+            self.hours[i] = local // 3600
+            self.minutes[i] = local // 60 % 60